@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+def enable_sqlite_wal(sender, connection, **kwargs):
+    # WAL lets searches keep reading while an upload is being committed
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL;')
 
 class TracestatsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tracestats'
 
+    def ready(self):
+        connection_created.connect(enable_sqlite_wal)
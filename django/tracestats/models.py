@@ -2,8 +2,14 @@ import secrets
 import string
 import math
 from django.db import models
+from django.utils.functional import cached_property
 from django.utils.timezone import now
 
+# stat types which have their percentages computed against a trace total
+STATS_TYPE_TOTAL_FIELDS = {1: 'api_calls_total',
+                           7: 'render_states_total',
+                           8: 'query_types_total'}
+
 def generate_client_secret(length=32):
     characters = string.ascii_letters + string.digits + '_-'
     token = ''.join(secrets.choice(characters) for _ in range(length))
@@ -36,11 +42,13 @@ class Trace(models.Model):
         ]
 
 class Stats(models.Model):
+    # trace lookups are covered by trace_stat_name and trace_stat_type_count below
     trace      = models.ForeignKey(Trace,
-                                   on_delete=models.CASCADE)
+                                   on_delete=models.CASCADE,
+                                   db_index=False)
     created_on = models.DateTimeField(default=now)
     stat_type  = models.IntegerField()
-    stat_name  = models.CharField(max_length=255, db_index=True)
+    stat_name  = models.CharField(max_length=255)
     stat_count = models.IntegerField()
 
     class Meta:
@@ -48,31 +56,23 @@ class Stats(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['trace', 'stat_name'], name='trace_stat_name')
         ]
+        # match the ordering used by search results
+        indexes = [
+            models.Index(fields=['stat_type', '-stat_count', 'trace'], name='stat_type_count_trace'),
+            models.Index(fields=['stat_name', 'stat_type'], name='stat_name_type'),
+            models.Index(fields=['trace', 'stat_type', '-stat_count'], name='trace_stat_type_count')
+        ]
 
-    @property
-    def call_percentage(self):
-        if self.stat_type == 1 and self.trace.api_calls_total is not None:
-            # Don't display anything under 0.01 and round up to 2 demimal points of precision
-            result = round_up_two_decimals(max((self.stat_count * 100) / self.trace.api_calls_total, 0.01))
-            precision = 0 if result.is_integer() else (2 if (result * 100) % 10 != 0 else 1)
-            return f'{result:.{precision}f}'
-        return None
-
-    @property
-    def render_state_percentage(self):
-        if self.stat_type == 7 and self.trace.render_states_total is not None:
-            # Don't display anything under 0.01 and round up to 2 demimal points of precision
-            result = round_up_two_decimals(max((self.stat_count * 100) / self.trace.render_states_total, 0.01))
-            precision = 0 if result.is_integer() else (2 if (result * 100) % 10 != 0 else 1)
-            return f'{result:.{precision}f}'
-        return None
-
-    @property
-    def query_type_percentage(self):
-        if self.stat_type == 8 and self.trace.query_types_total is not None:
-            # Don't display anything under 0.01 and round up to 2 demimal points of precision
-            result = round_up_two_decimals(max((self.stat_count * 100) / self.trace.query_types_total, 0.01))
-            precision = 0 if result.is_integer() else (2 if (result * 100) % 10 != 0 else 1)
-            return f'{result:.{precision}f}'
-        return None
-
+    @cached_property
+    def percentage(self):
+        # only some stat types have a total value tracked in their trace
+        total_field = STATS_TYPE_TOTAL_FIELDS.get(self.stat_type, None)
+        if total_field is None:
+            return None
+        total = getattr(self.trace, total_field)
+        if total is None:
+            return None
+        # Don't display anything under 0.01 and round up to 2 demimal points of precision
+        result = round_up_two_decimals(max((self.stat_count * 100) / total, 0.01))
+        precision = 0 if result.is_integer() else (2 if (result * 100) % 10 != 0 else 1)
+        return f'{result:.{precision}f}'
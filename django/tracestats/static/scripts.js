@@ -187,7 +187,7 @@ $(document).on('click', '#toggle-file-upload', function() {
     });
 });
 
-$(document).on('click', '#upload-button', function() {
+$(document).on('click', '#upload-button', function(event) {
     removeURLSearchParameter();
     const fileInput = $('.file-input');
 
@@ -196,12 +196,33 @@ $(document).on('click', '#upload-button', function() {
         const maxSizeInBytes = 16777216; // 16 MB
 
         if (file && file.size <= maxSizeInBytes) {
-            const csrfInput = $('<input>')
-                                .attr('type', 'hidden')
-                                .attr('name', 'csrfmiddlewaretoken')
-                                .val(getCookie('csrftoken'));
-            $('#file-upload-form').append(csrfInput);
-            $('#file-upload-form').submit();
+            event.preventDefault();
+            const formData = new FormData($('#file-upload-form')[0]);
+            formData.append('upload-form', '');
+
+            $.ajax({
+                url: window.location.pathname,
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': getCookie('csrftoken')
+                },
+                data: formData,
+                processData: false,
+                contentType: false,
+                success: function(response) {
+                    $('#search-results').hide();
+                    $('#file-upload-area').html('');
+                    $('#toggle-file-upload').attr('class', 'search-button');
+                    $('#traces-total').text(response.traces_total);
+                    $('#notification-area').attr('class', response.notification_type);
+                    $('#notification-area').text(response.notification_message);
+                },
+                error: function(xhr) {
+                    $('#upload-notification-area').attr('class', 'notification-error');
+                    $('#upload-notification-area').text('The upload has been shot down by a French knight (HTTP ' +
+                                                        xhr.status + '). Better luck next time.');
+                }
+            });
         } else if (file && file.size > maxSizeInBytes) {
             if($('.password-input').val()) {
                 $('#file-upload-form')[0].reset();
@@ -7,6 +7,9 @@ register = template.Library()
 def pcgwize(value):
     if not value:
         return ''
+    # most names won't need any substitutions, so skip building a copy
+    if '&' not in value:
+        return value
 
     return_string = value.replace('&', '%26')
     
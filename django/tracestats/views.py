@@ -1,15 +1,29 @@
 import json
 import re
 import logging
+import hashlib
 
 from urllib.parse import quote, unquote
 from django.shortcuts import render, redirect
 from django.template import loader
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.template.context_processors import csrf
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Count
 from django.utils.timezone import now
 from . import forms
 from . import models
+# ijson is optional and only used along with its C backend, since
+# the pure Python ones end up slower than plain json for uploads
+try:
+  import ijson
+  ijson_backend = ijson.get_backend('yajl2_c')
+  IJSON_IS_IMPORTED = True
+  JSON_DECODE_ERRORS = (json.JSONDecodeError, ijson.JSONError)
+except ImportError:
+  IJSON_IS_IMPORTED = False
+  JSON_DECODE_ERRORS = (json.JSONDecodeError,)
 
 logger = logging.getLogger('tracestats')
 
@@ -54,6 +68,10 @@ API_ENTRY_CALLS = {'IDirect3DDevice7': 'D3D7',
                    'D3D11CreateDevice': 'D3D11',
                    'D3D11CoreCreateDevice': 'D3D11'}
 
+# (entry call, API) pairs, in the order in which they need to be checked
+API_ENTRY_CALLS_ITEMS = tuple(API_ENTRY_CALLS.items())
+API_ENTRY_CALLS_SET = frozenset(API_ENTRY_CALLS)
+
 TRACE_API_OVERRIDES = {'wargame_'   : 'D3D9Ex', # Ignore queries done on a plain D3D9 interface, as it's not used for rendering
                        'xrEngine___': 'D3D10',  # Creates a D3D11 device first, but renders using D3D10
                        'RebelGalaxy': 'D3D11'}  # Creates a D3D10 device first, but renders using D3D11
@@ -90,12 +108,77 @@ STATS_TYPE = {'api_calls': 1,
               'texture_map_modes': 30,}
 
 SEARCH_RESULTS_LIMIT = 999
+# only load what the search results template needs
+SEARCH_RESULTS_FIELDS = ('stat_type',
+                         'stat_name',
+                         'stat_count',
+                         'trace',
+                         'trace__name',
+                         'trace__link',
+                         'trace__api',
+                         'trace__api_calls_total',
+                         'trace__render_states_total',
+                         'trace__query_types_total')
+
+STATS_BULK_CREATE_BATCH_SIZE = 1000
+
+TRACES_TOTAL_CACHE_KEY = 'traces_total'
+TRACES_TOTAL_CACHE_TIMEOUT = 60 # seconds
+TOKEN_CACHE_KEY_PREFIX = 'token_'
+# the default cache is local to each server process, so keep this short
+# enough for revoked tokens to stop working in all of them fairly soon
+TOKEN_CACHE_TIMEOUT = 5 # seconds
+
+# the titles list template only needs plain values
+TITLES_LIST_FIELDS = ('name', 'link', 'binary_name', 'api')
+TITLES_LIST_CHUNK_SIZE = 500
+
+# only one of these panels can be visible at a time
+PANEL_SESSION_KEYS = ('titles_list_visible',
+                      'api_stats_visible',
+                      'file_upload_visible')
+
+# precomputed JSON response body for hidden panels
+EMPTY_CONTENT_RESPONSE = b'{"content": ""}'
+
+def get_traces_total():
+  traces_total = cache.get(TRACES_TOTAL_CACHE_KEY)
+  if traces_total is None:
+    traces_total = models.Trace.objects.count()
+    cache.set(TRACES_TOTAL_CACHE_KEY, traces_total, TRACES_TOTAL_CACHE_TIMEOUT)
+  return traces_total
+
+def toggle_panel(request, panel_key, panel_visible=None):
+  # flip the panel visibility, unless explicitly specified, and hide all the others
+  if panel_visible is None:
+    panel_visible = not request.session.get(panel_key, False)
+
+  request.session.update({session_key: session_key == panel_key and panel_visible
+                          for session_key in PANEL_SESSION_KEYS})
+
+  return panel_visible
+
+def mark_search_input(stat_name, search_input_lower):
+  # plain substring search, for when lowercasing can't shift any positions
+  stat_name_lower = stat_name.lower()
+  search_input_length = len(search_input_lower)
+  marked_parts = []
+  start = 0
+
+  position = stat_name_lower.find(search_input_lower)
+  while position != -1:
+    marked_parts.append(stat_name[start:position])
+    marked_parts.append(f'<mark>{stat_name[position:position + search_input_length]}</mark>')
+    start = position + search_input_length
+    position = stat_name_lower.find(search_input_lower, start)
+  marked_parts.append(stat_name[start:])
+
+  return ''.join(marked_parts)
 
 def tracestats(request):
-  request.session['titles_list_visible'] = False
-  request.session['api_stats_visible'] = False
-  request.session['file_upload_visible'] = False
-  request.session.modified = True
+  # all panels start out hidden, but only save the session if that changes anything
+  if any(request.session.get(panel_key, False) for panel_key in PANEL_SESSION_KEYS):
+    request.session.update(dict.fromkeys(PANEL_SESSION_KEYS, False))
   search_form = None
   search_results = None
   context = {}
@@ -108,122 +191,150 @@ def tracestats(request):
         upload_token = request.POST['authorization_token']
         #logger.debug(f'Auth_token: {upload_token}')
 
-        try:
-          token = models.Tokens.objects.get(token=upload_token)
-        except models.Tokens.DoesNotExist:
-          token = None
+        # only valid tokens are cached, for repeated uploads, and never
+        # by their raw value, which shouldn't end up in any cache backend
+        token_cache_key = f'{TOKEN_CACHE_KEY_PREFIX}{hashlib.sha256(upload_token.encode()).hexdigest()}'
+        token_id = cache.get(token_cache_key)
+        if token_id is None:
+          try:
+            token_id = models.Tokens.objects.only('id').get(token=upload_token).id
+            cache.set(token_cache_key, token_id, TOKEN_CACHE_TIMEOUT)
+          except models.Tokens.DoesNotExist:
+            token_id = None
 
-        if token is not None:
+        if token_id is not None:
           uploaded_file = request.FILES['file_upload']
-          logger.debug(f'Uploaded file name is: {uploaded_file.name}')
+          logger.debug('Uploaded file name is: %s', uploaded_file.name)
 
           try:
-            # Read the content of the file
-            file_content = uploaded_file.read().decode('utf-8')
-            tracestats_data = json.loads(file_content).get(JSON_BASE_KEY)
-
-            if tracestats_data is not None:
-              for entry in tracestats_data:
-                # create/update base trace db entry
-                entry_application_name = entry.get('name')
-                logger.debug(f'Application name is: {entry_application_name}')
-                entry_binary_name = entry.get('binary_name')
-                logger.debug(f'Binary name is: {entry_binary_name}')
-                # use the binary name for the application name, if unspecified
-                if entry_application_name is None:
-                  entry_application_name = entry_binary_name
-                entry_application_link = entry.get('link', None)
-
-                entry_call_stats = entry.get('api_calls', {})
-                # determine the API based on the entrypoint call
-                entry_api = None
-                entry_api_override = TRACE_API_OVERRIDES.get(entry_binary_name, None)
-                if entry_api_override is not None:
-                  entry_api = entry_api_override
-                else:
-                  for key, value in API_ENTRY_CALLS.items():
-                    # D3D6/D3D7 entry call identifiers aren't stand alone strings,
-                    # but rather part of a D3D subcall, due to the nature of those APIs
-                    if key in [entry_call.split(API_ENTRY_CALL_IDENTIFIER)[0] for entry_call in entry_call_stats.keys()]:
-                      entry_api = value
-                      logger.debug(f'Found an entry call for: {entry_api}')
-                      break
-                logger.debug(f'API is: {entry_api}')
-                if entry_api is None:
-                  raise Exception('Invalid JSON structure')
-                # convert API name to numeric value
-                else:
-                  entry_api = API_VALUES_ENCODE.get(entry_api)
-
-                # determine the total API call count in the trace
-                entry_api_calls_total = 0
-                for value in entry_call_stats.values():
-                  entry_api_calls_total = entry_api_calls_total + value
-                # don't populate the db field to save some space if 0
-                if entry_api_calls_total == 0:
-                  entry_api_calls_total = None
-                logger.debug(f'Total API call count is: {entry_api_calls_total}')
-
-                entry_render_states = entry.get('render_states', {})
-                # determine the total render state count in the trace
-                entry_render_states_total = 0
-                for value in entry_render_states.values():
-                  entry_render_states_total = entry_render_states_total + value
-                # don't populate the db field to save some space if 0
-                if entry_render_states_total == 0:
-                  entry_render_states_total = None
-                logger.debug(f'Total render state count is: {entry_render_states_total}')
-
-                entry_query_types = entry.get('query_types', {})
-                # determine the total query types count in the trace
-                entry_query_types_total = 0
-                for value in entry_query_types.values():
-                  entry_query_types_total = entry_query_types_total + value
-                # don't populate the db field to save some space if 0
-                if entry_query_types_total == 0:
-                  entry_query_types_total = None
-                logger.debug(f'Total query types count is: {entry_query_types_total}')
-
-                try:
-                  existing_trace = models.Trace.objects.get(name=entry_application_name, api=entry_api)
-                except models.Trace.DoesNotExist:
-                  existing_trace = None
-
-                if existing_trace is None:
-                  trace = models.Trace(name=entry_application_name,
+            if IJSON_IS_IMPORTED:
+              # parse each entry as it streams out of the uploaded file,
+              # rather than reading all of the raw content in memory first
+              tracestats_data = ijson_backend.items(uploaded_file, f'{JSON_BASE_KEY}.item', use_float=True)
+            else:
+              # json decodes UTF-8 bytes by itself, so skip the intermediate str copy
+              tracestats_data = json.loads(uploaded_file.read()).get(JSON_BASE_KEY) or ()
+
+            parsed_entries = []
+
+            for entry in tracestats_data:
+              # determine the base trace db entry values
+              entry_application_name = entry.get('name')
+              logger.debug('Application name is: %s', entry_application_name)
+              entry_binary_name = entry.get('binary_name')
+              logger.debug('Binary name is: %s', entry_binary_name)
+              # use the binary name for the application name, if unspecified
+              if entry_application_name is None:
+                entry_application_name = entry_binary_name
+              entry_application_link = entry.get('link', None)
+
+              entry_call_stats = entry.get('api_calls', {})
+              # determine the API based on the entrypoint call
+              entry_api = None
+              entry_api_override = TRACE_API_OVERRIDES.get(entry_binary_name, None)
+              if entry_api_override is not None:
+                entry_api = entry_api_override
+              else:
+                # D3D6/D3D7 entry call identifiers aren't stand alone strings,
+                # but rather part of a D3D subcall, due to the nature of those APIs
+                entry_calls = API_ENTRY_CALLS_SET.intersection(entry_call.split(API_ENTRY_CALL_IDENTIFIER, 1)[0]
+                                                               for entry_call in entry_call_stats)
+                # respect the entry call check order when more than one is present
+                entry_api = next((value for key, value in API_ENTRY_CALLS_ITEMS if key in entry_calls), None)
+                if entry_api is not None:
+                  logger.debug('Found an entry call for: %s', entry_api)
+              logger.debug('API is: %s', entry_api)
+              if entry_api is None:
+                raise ValueError('Invalid JSON structure')
+              # convert API name to numeric value
+              else:
+                entry_api = API_VALUES_ENCODE.get(entry_api)
+
+              # determine the total API call count in the trace, but
+              # don't populate the db field to save some space if 0
+              entry_api_calls_total = sum(entry_call_stats.values()) or None
+              logger.debug('Total API call count is: %s', entry_api_calls_total)
+              # determine the total render state count in the trace
+              entry_render_states_total = sum(entry.get('render_states', {}).values()) or None
+              logger.debug('Total render state count is: %s', entry_render_states_total)
+              # determine the total query types count in the trace
+              entry_query_types_total = sum(entry.get('query_types', {}).values()) or None
+              logger.debug('Total query types count is: %s', entry_query_types_total)
+
+              parsed_entries.append((entry,
+                                     entry_application_name,
+                                     entry_application_link,
+                                     entry_binary_name,
+                                     entry_api,
+                                     entry_api_calls_total,
+                                     entry_render_states_total,
+                                     entry_query_types_total))
+
+            if parsed_entries:
+              # commit all the upload changes in a single transaction
+              with transaction.atomic():
+                # only the last occurrence of a trace in the upload is kept
+                upload_entries = {(parsed_entry[1], parsed_entry[4]): parsed_entry for parsed_entry in parsed_entries}
+                upload_time = now()
+
+                traces = [models.Trace(name=entry_application_name,
                                        link=entry_application_link,
                                        binary_name=entry_binary_name,
-                                       updated_by=token,
+                                       updated_by_id=token_id,
+                                       updated_last=upload_time,
                                        api=entry_api,
                                        api_calls_total=entry_api_calls_total,
                                        render_states_total=entry_render_states_total,
                                        query_types_total=entry_query_types_total)
-                  trace.save()
-                else:
-                  trace = existing_trace
-                  # clear any existing stats if we are updating the trace
-                  models.Stats.objects.filter(trace=trace).delete()
-                  # update the new values in the trace entry
-                  trace.link = entry_application_link
-                  trace.binary_name = entry_binary_name
-                  trace.updated_by = token
-                  trace.updated_last = now()
-                  trace.api = entry_api
-                  trace.api_calls_total = entry_api_calls_total
-                  trace.render_states_total = entry_render_states_total
-                  trace.query_types_total = entry_query_types_total
-                  trace.save()
-
-                for stat_type in STATS_TYPE.keys():
-                  entry_stats_values = entry.get(stat_type, {})
-                  stats = []
-                  for key, value in entry_stats_values.items():
-                    stats.append(models.Stats(trace=trace,
-                                              stat_type=STATS_TYPE[stat_type],
+                          for (entry, entry_application_name, entry_application_link, entry_binary_name, entry_api,
+                               entry_api_calls_total, entry_render_states_total, entry_query_types_total) in upload_entries.values()]
+                # create/update all the base trace db entries in one go
+                models.Trace.objects.bulk_create(traces,
+                                                 update_conflicts=True,
+                                                 unique_fields=['name', 'api'],
+                                                 update_fields=['link',
+                                                                'binary_name',
+                                                                'updated_by',
+                                                                'updated_last',
+                                                                'api_calls_total',
+                                                                'render_states_total',
+                                                                'query_types_total'])
+                # upserts don't return primary keys, so fetch them separately
+                upload_traces = models.Trace.objects.filter(name__in={upload_key[0] for upload_key in upload_entries},
+                                                            api__in={upload_key[1] for upload_key in upload_entries})
+                trace_ids = {(trace_name, trace_api): trace_id
+                             for trace_id, trace_name, trace_api in upload_traces.values_list('id', 'name', 'api')}
+                upload_trace_ids = [trace_ids[upload_key] for upload_key in upload_entries]
+
+                stats = []
+                for trace_id, (entry, *_) in zip(upload_trace_ids, upload_entries.values()):
+                  # only walk the sections which are actually present in the entry
+                  for entry_key, entry_stats in entry.items():
+                    stat_type = STATS_TYPE.get(entry_key, None)
+                    if stat_type is None or not entry_stats:
+                      continue
+                    # malformed sections invalidate the whole upload
+                    if not isinstance(entry_stats, dict):
+                      raise ValueError('Invalid JSON structure')
+                    stats.extend(models.Stats(trace_id=trace_id,
+                                              created_on=upload_time,
+                                              stat_type=stat_type,
                                               stat_name=key,
-                                              stat_count=value))
-                  if len(stats) > 0:
-                    models.Stats.objects.bulk_create(stats)
+                                              stat_count=value) for key, value in entry_stats.items())
+                # existing stats of the uploaded traces are updated in place
+                if len(stats) > 0:
+                  models.Stats.objects.bulk_create(stats,
+                                                   batch_size=STATS_BULK_CREATE_BATCH_SIZE,
+                                                   update_conflicts=True,
+                                                   unique_fields=['trace', 'stat_name'],
+                                                   update_fields=['created_on',
+                                                                  'stat_type',
+                                                                  'stat_count'])
+                # and any stats which are no longer present get cleared
+                models.Stats.objects.filter(trace_id__in=upload_trace_ids, created_on__lt=upload_time).delete()
+
+              # new traces may have been added by the upload
+              cache.delete(TRACES_TOTAL_CACHE_KEY)
 
               context = {'notification_message': 'All good. You\'ve cossed the Bridge of Death.',
                          'notification_type': 'notification-success'}
@@ -234,10 +345,11 @@ def tracestats(request):
           except UnicodeDecodeError:
             context = {'notification_message': 'That\'s not even a text file. Try hader next time, won\'t you?',
                        'notification_type': 'notification-error'}
-          except json.JSONDecodeError:
+          except JSON_DECODE_ERRORS:
             context = {'notification_message': 'That is most certainly not a JSON. Think you\'re pretty funny, don\'t ya\'?',
                        'notification_type': 'notification-error'}
-          except Exception as e:
+          # entries with missing or mistyped values end up here
+          except (ValueError, KeyError, TypeError, AttributeError, OverflowError, DatabaseError) as e:
             logger.error('Encountered exception: ', exc_info=e)
             context = {'notification_message': 'The JSON structure is incorrect. Just use whatever tracestats generates, ok?',
                        'notification_type': 'notification-error'}
@@ -248,6 +360,11 @@ def tracestats(request):
         context = {'notification_message': 'That file has upset the Rabbit of Caerbannog. Naughty naughty.',
                    'notification_type': 'notification-error'}
 
+      # uploads sent by the page scripts only need to know the outcome
+      if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        context['traces_total'] = get_traces_total()
+        return JsonResponse(context)
+
     elif 'search-form' in request.POST:
       search_form = forms.SearchForm(request.POST)
       if search_form.is_valid():
@@ -261,7 +378,7 @@ def tracestats(request):
     search_input = request.GET.get('search', None)
 
     if search_input is not None:
-      logger.info(f'Search input: {search_input}')
+      logger.info('Search input: %s', search_input)
 
       if len(search_input) < 2:
         return redirect(f'{request.path}')
@@ -275,51 +392,70 @@ def tracestats(request):
         search_input = search_bang_split[0]
         exact_search = True
 
+      search_queryset = models.Stats.objects.select_related('trace').only(*SEARCH_RESULTS_FIELDS)
+
       # Note that all searches are case insensitive in SQLite
       if not exact_search:
-        search_results = models.Stats.objects.filter(stat_name__icontains=search_input).order_by('stat_type',
-                                                                                                 '-stat_count',
-                                                                                                 'trace__name',
-                                                                                                 'trace__api')[:SEARCH_RESULTS_LIMIT]
+        search_results = search_queryset.filter(stat_name__icontains=search_input).order_by('stat_type',
+                                                                                            '-stat_count',
+                                                                                            'trace__name',
+                                                                                            'trace__api')[:SEARCH_RESULTS_LIMIT]
       else:
-        search_results = models.Stats.objects.filter(stat_name__exact=search_input).order_by('stat_type',
-                                                                                             '-stat_count',
-                                                                                             'trace__name',
-                                                                                             'trace__api')[:SEARCH_RESULTS_LIMIT]
+        search_results = search_queryset.filter(stat_name__exact=search_input).order_by('stat_type',
+                                                                                        '-stat_count',
+                                                                                        'trace__name',
+                                                                                        'trace__api')[:SEARCH_RESULTS_LIMIT]
 
-      if len(search_results) == 0:
+      # evaluate the query once, rather than on every subsequent check
+      search_results = list(search_results)
+
+      if not search_results:
         # If no objects are found, do a search based on application names
         if not exact_search:
-          search_results = models.Stats.objects.filter(trace__name__icontains=search_input).order_by('trace__name',
-                                                                                                     'trace__api',
-                                                                                                     'stat_type',
-                                                                                                     '-stat_count')[:SEARCH_RESULTS_LIMIT]
+          search_results = search_queryset.filter(trace__name__icontains=search_input).order_by('trace__name',
+                                                                                                'trace__api',
+                                                                                                'stat_type',
+                                                                                                '-stat_count')[:SEARCH_RESULTS_LIMIT]
         else:
-          search_results = models.Stats.objects.filter(trace__name__exact=search_input).order_by('trace__name',
-                                                                                                 'trace__api',
-                                                                                                 'stat_type',
-                                                                                                 '-stat_count')[:SEARCH_RESULTS_LIMIT]
+          search_results = search_queryset.filter(trace__name__exact=search_input).order_by('trace__name',
+                                                                                            'trace__api',
+                                                                                            'stat_type',
+                                                                                            '-stat_count')[:SEARCH_RESULTS_LIMIT]
+
+        search_results = list(search_results)
 
-        if len(search_results) == 0:
+        if not search_results:
           # If no results of any kind could be found, show a notification to that extent
           context = {'notification_message': 'I\'m afraid that particular shrubbery is nowhere to be found.',
                      'notification_type': 'notification-info'}
       else:
         # Highlight the searched text in the returned results
-        for search_result in search_results:
-          result_stat_name = search_result.stat_name
+        if exact_search:
+          # exact matches span the whole name, so there's no need for a regex
+          for search_result in search_results:
+            search_result.stat_name = f'<mark>{search_result.stat_name}</mark>'
+        elif search_input.isascii():
+          # literal ASCII searches can skip the regex engine, as long as the names are ASCII too
+          search_input_lower = search_input.lower()
+          search_pattern = None
+
+          for search_result in search_results:
+            if search_result.stat_name.isascii():
+              search_result.stat_name = mark_search_input(search_result.stat_name, search_input_lower)
+            else:
+              if search_pattern is None:
+                search_pattern = re.compile(re.escape(search_input), flags=re.IGNORECASE)
+              search_result.stat_name = search_pattern.sub(r'<mark>\g<0></mark>', search_result.stat_name)
+        else:
+          search_pattern = re.compile(re.escape(search_input), flags=re.IGNORECASE)
 
-          highlighted_text = re.sub(re.escape(search_input),
-                                    lambda match: f'<mark>{match.group(0)}</mark>',
-                                    result_stat_name,
-                                    flags=re.IGNORECASE)
-          search_result.stat_name = highlighted_text
+          for search_result in search_results:
+            search_result.stat_name = search_pattern.sub(r'<mark>\g<0></mark>', search_result.stat_name)
 
-  context['traces_total'] = models.Trace.objects.count()
+  context['traces_total'] = get_traces_total()
 
   if search_form is None:
     search_form = forms.SearchForm()
-  template = loader.get_template('home.html')
   context['form'] = search_form
   context['api_values_decode'] = API_VALUES_DECODE
   context['search_results'] = search_results
@@ -331,42 +467,30 @@ def generate_titles_list(request):
   else:
     try:
       sort_by = int(request.POST.get('sort'))
-    except:
+    except (TypeError, ValueError):
       sort_by = None
 
     if sort_by == 1:
-      titles_list = models.Trace.objects.only('name', 'link', 'binary_name', 'api').order_by('api',
-                                                                                             'name')
+      titles_list = models.Trace.objects.values(*TITLES_LIST_FIELDS).order_by('api',
+                                                                              'name')
     elif sort_by == 2:
-      titles_list = models.Trace.objects.only('name', 'link', 'binary_name', 'api').order_by('binary_name')
+      titles_list = models.Trace.objects.values(*TITLES_LIST_FIELDS).order_by('binary_name')
     # Catch-all for 0 or None
     else:
-      titles_list = models.Trace.objects.only('name', 'link', 'binary_name', 'api').order_by('name',
-                                                                                             'api')
-
-    if sort_by is None:
-      try:
-        request.session['titles_list_visible'] = not request.session['titles_list_visible']
-        request.session.modified = True
-      except KeyError:
-        request.session['titles_list_visible'] = True
-        request.session.modified = True
-    else:
-      request.session['titles_list_visible'] = True
+      titles_list = models.Trace.objects.values(*TITLES_LIST_FIELDS).order_by('name',
+                                                                              'api')
 
-    if request.session['titles_list_visible']:
+    # changing the sort order always keeps the list visible
+    if toggle_panel(request, 'titles_list_visible', None if sort_by is None else True):
       context = {}
-      context['titles_list'] = titles_list
+      # stream the rows from the db instead of caching them on the queryset
+      context['titles_list'] = titles_list.iterator(chunk_size=TITLES_LIST_CHUNK_SIZE)
       context['api_values_decode'] = API_VALUES_DECODE
       context.update(csrf(request))
       content = loader.render_to_string('titles_list.html', context)
     else:
       content = ""
 
-    request.session['api_stats_visible'] = False
-    request.session['file_upload_visible'] = False
-    request.session.modified = True
-
     return JsonResponse({'content': content})
 
 def generate_stats(request):
@@ -375,23 +499,11 @@ def generate_stats(request):
   else:
     api_stats = {}
 
-    try:
-      request.session['api_stats_visible'] = not request.session['api_stats_visible']
-      request.session.modified = True
-    except KeyError:
-      request.session['api_stats_visible'] = True
-      request.session.modified = True
-
-    if request.session['api_stats_visible']:
-      api_stats['d3d3']   = models.Trace.objects.filter(api=1).count()
-      api_stats['d3d5']   = models.Trace.objects.filter(api=2).count()
-      api_stats['d3d6']   = models.Trace.objects.filter(api=3).count()
-      api_stats['d3d7']   = models.Trace.objects.filter(api=4).count()
-      api_stats['d3d8']   = models.Trace.objects.filter(api=5).count()
-      api_stats['d3d9']   = models.Trace.objects.filter(api=6).count()
-      api_stats['d3d9ex'] = models.Trace.objects.filter(api=7).count()
-      api_stats['d3d10']  = models.Trace.objects.filter(api=8).count()
-      api_stats['d3d11']  = models.Trace.objects.filter(api=9).count()
+    if toggle_panel(request, 'api_stats_visible'):
+      # count the traces of all APIs in a single grouped query
+      api_counts = dict(models.Trace.objects.order_by().values_list('api').annotate(api_count=Count('id')))
+      for api_value, api_name in API_VALUES_DECODE.items():
+        api_stats[api_name.lower()] = api_counts.get(api_value, 0)
 
       context = {}
       context.update(csrf(request))
@@ -399,10 +511,6 @@ def generate_stats(request):
     else:
       content = ""
 
-    request.session['titles_list_visible'] = False
-    request.session['file_upload_visible'] = False
-    request.session.modified = True
-
     return JsonResponse({'content': content,
                          'api_stats': api_stats})
 
@@ -410,24 +518,12 @@ def generate_file_upload(request):
   if request.method != 'POST':
     return JsonResponse({'error': 'The Rabbit of Caerbannog pounces on you and you die!'}, status=403)
   else:
-    try:
-      request.session['file_upload_visible'] = not request.session['file_upload_visible']
-      request.session.modified = True
-    except KeyError:
-      request.session['file_upload_visible'] = True
-      request.session.modified = True
-
-    if request.session['file_upload_visible']:
+    if toggle_panel(request, 'file_upload_visible'):
       file_upload_form = forms.FileUploadForm()
       context = {'file_upload_form': file_upload_form}
       context.update(csrf(request))
       content = loader.render_to_string('file_upload.html', context)
+      return JsonResponse({'content': content})
     else:
-      content = ""
-
-    request.session['titles_list_visible'] = False
-    request.session['api_stats_visible'] = False
-    request.session.modified = True
-
-    return JsonResponse({'content': content})
+      return HttpResponse(EMPTY_CONTENT_RESPONSE, content_type='application/json')
 
@@ -6,6 +6,7 @@
 '''
 
 import os
+import re
 import json
 import logging
 import argparse
@@ -14,6 +15,9 @@ import queue
 import threading
 import signal
 import shutil
+from collections import Counter
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 # uncomment for debugging purposes only
 #import traceback
 
@@ -34,6 +38,7 @@ logger.setLevel(logging.INFO) # DEBUG, INFO, WARNING, ERROR, CRITICAL
 # constants
 TRACE_PARSE_CHUNK_CALLS = 100000
 TRACE_PARSE_QUEUE_SIZE = 10
+TRACE_DUMP_BUFFER_SIZE = 1048576 # 1 MB
 TRACE_LOGGING_CHUNK_CALLS = 10000000
 JSON_BASE_KEY = 'tracestats'
 JSON_EXPORT_FOLDER_NAME = 'export'
@@ -62,6 +67,10 @@ API_ENTRY_CALLS = {'IDirect3DDevice7': 'D3D7',
                    'D3D11CreateDeviceAndSwapChain': 'D3D11',
                    'D3D11CreateDevice': 'D3D11',
                    'D3D11CoreCreateDevice': 'D3D11'}
+# the leftmost match wins, and only at the same position are alternatives tried in order,
+# so list the longest calls first to never match just a prefix of a longer entry call
+API_ENTRY_CALLS_PATTERN = re.compile('|'.join(re.escape(api_entry_call) for api_entry_call in
+                                              sorted(API_ENTRY_CALLS.keys(), key=len, reverse=True)))
 
 API_BASE_CALLS = {**API_ENTRY_CALLS, 'DirectDrawCreateEx': 'DDraw7',
                                      'DirectDrawEnumerateExA': 'DDraw7',
@@ -74,6 +83,8 @@ API_BASE_CALLS = {**API_ENTRY_CALLS, 'DirectDrawCreateEx': 'DDraw7',
                                      'CreateDXGIFactory': 'DXGI',
                                      'CreateDXGIFactory1': 'DXGI',
                                      'CreateDXGIFactory2': 'DXGI'}
+# a single pass check for any of the base calls on a trace line
+API_BASE_CALLS_PATTERN = re.compile('|'.join(re.escape(api_base_call) for api_base_call in API_BASE_CALLS.keys()))
 
 TRACE_API_OVERRIDES = {'wargame_'   : 'D3D9Ex', # Ignore queries done on a plain D3D9 interface, as it's not used for rendering
                        'xrEngine___': 'D3D10',  # Creates a D3D11 device first, but renders using D3D10
@@ -261,6 +272,13 @@ RENDER_STATES_SKIPPED = ('-1', '99')
 QUERY_TYPE_CALL_D3D8 = '::GetInfo'
 QUERY_TYPE_IDENTIFIER_D3D8 = 'DevInfoID = '
 QUERY_TYPE_IDENTIFIER_LENGTH_D3D8 = len(QUERY_TYPE_IDENTIFIER_D3D8)
+# these values aren't usually included in any headers
+D3D8_QUERY_TYPES = {1: 'D3DDEVINFOID_TEXTUREMANAGER',
+                    2: 'D3DDEVINFOID_D3DTEXTUREMANAGER',
+                    3: 'D3DDEVINFOID_TEXTURING',
+                    4: 'D3DDEVINFOID_VCACHE',
+                    5: 'D3DDEVINFOID_RESOURCEMANAGER',
+                    6: 'D3DDEVINFOID_VERTEXSTATS'}
 QUERY_TYPE_CALL_D3D9_10_11 = '::CreateQuery'
 QUERY_TYPE_IDENTIFIER_D3D9 = 'Type = '
 QUERY_TYPE_IDENTIFIER_LENGTH_D3D9 = len(QUERY_TYPE_IDENTIFIER_D3D9)
@@ -390,21 +408,19 @@ def sigint_handler(signum, frame):
 
     raise SystemExit(0)
 
+def trace_worker_init():
+    # leave SIGINT handling to the main process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # the main process terminates workers when halting, so don't catch SIGTERM
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
 class TraceStats:
     '''Trace parser for statistics generation'''
 
-    # these values aren't usually included in any headers
     @classmethod
     def d3d8_query_type(cls, value):
         try:
-            match int(value):
-                case 1: return 'D3DDEVINFOID_TEXTUREMANAGER'
-                case 2: return 'D3DDEVINFOID_D3DTEXTUREMANAGER'
-                case 3: return 'D3DDEVINFOID_TEXTURING'
-                case 4: return 'D3DDEVINFOID_VCACHE'
-                case 5: return 'D3DDEVINFOID_RESOURCEMANAGER'
-                case 6: return 'D3DDEVINFOID_VERTEXSTATS'
-                case _: return 'Unknown'
+            return D3D8_QUERY_TYPES.get(int(value), 'Unknown')
         except ValueError:
             return 'Unknown'
 
@@ -500,365 +516,450 @@ class TraceStats:
         self.compressed_trace = False
         self.binary_name_raw = None
         self.binary_name = None
+        # names and links specified on the command line apply to all traces
+        self.default_application_name = application_name
+        self.default_application_link = application_link
         self.application_name = application_name
         self.application_link = application_link
         self.traceappnames_api = None
         self.api = None
         self.shader_dump_call_array = []
-        self.api_call_dictionary = {}
-        self.vendor_hack_check_dictionary = {}
-        self.device_type_dictionary = {}
-        self.behavior_flag_dictionary = {}
-        self.present_parameter_dictionary = {}
-        self.present_parameter_flag_dictionary = {}
-        self.render_state_dictionary = {}
-        self.query_type_dictionary = {}
-        self.lock_flag_dictionary = {}
-        self.shader_version_dictionary = {}
-        self.pixel_format_dictionary = {}
-        self.format_dictionary = {}
-        self.vendor_hack_dictionary = {}
-        self.pool_dictionary = {}
-        self.device_flag_dictionary = {}
-        self.swapchain_parameter_dictionary = {}
-        self.swapchain_buffer_usage_dictionary = {}
-        self.swapchain_flag_dictionary = {}
-        self.feature_level_dictionary = {}
-        self.rastizer_state_dictionary = {}
-        self.blend_state_dictionary = {}
-        self.usage_dictionary = {}
-        self.bind_flag_dictionary = {}
-        self.cooperative_level_flag_dictionary = {}
-        self.flip_flag_dictionary = {}
-        self.draw_flag_dictionary = {}
-        self.process_vertices_flag_dictionary = {}
-        self.surface_cap_dictionary = {}
-        self.vertex_buffer_cap_dictionary = {}
-        self.texture_map_mode_dictionary = {}
+        self.api_call_dictionary = Counter()
+        self.vendor_hack_check_dictionary = Counter()
+        self.device_type_dictionary = Counter()
+        self.behavior_flag_dictionary = Counter()
+        self.present_parameter_dictionary = Counter()
+        self.present_parameter_flag_dictionary = Counter()
+        self.render_state_dictionary = Counter()
+        self.query_type_dictionary = Counter()
+        self.lock_flag_dictionary = Counter()
+        self.shader_version_dictionary = Counter()
+        self.pixel_format_dictionary = Counter()
+        self.format_dictionary = Counter()
+        self.vendor_hack_dictionary = Counter()
+        self.pool_dictionary = Counter()
+        self.device_flag_dictionary = Counter()
+        self.swapchain_parameter_dictionary = Counter()
+        self.swapchain_buffer_usage_dictionary = Counter()
+        self.swapchain_flag_dictionary = Counter()
+        self.feature_level_dictionary = Counter()
+        self.rastizer_state_dictionary = Counter()
+        self.blend_state_dictionary = Counter()
+        self.usage_dictionary = Counter()
+        self.bind_flag_dictionary = Counter()
+        self.cooperative_level_flag_dictionary = Counter()
+        self.flip_flag_dictionary = Counter()
+        self.draw_flag_dictionary = Counter()
+        self.process_vertices_flag_dictionary = Counter()
+        self.surface_cap_dictionary = Counter()
+        self.vertex_buffer_cap_dictionary = Counter()
+        self.texture_map_mode_dictionary = Counter()
+
+        self.init_sync_primitives()
+        self.json_output = {JSON_BASE_KEY: []}
+
+    def __getstate__(self):
+        # queues and events can't be pickled, so leave them out
+        # when handing over trace processing to worker processes
+        state = self.__dict__.copy()
+        for sync_primitive in ('process_queue', 'api_skip', 'parse_loop', 'process_loop'):
+            del state[sync_primitive]
+        return state
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.init_sync_primitives()
+
+    def init_sync_primitives(self):
         self.process_queue = queue.Queue(maxsize=TRACE_PARSE_QUEUE_SIZE)
         self.api_skip = threading.Event()
         self.parse_loop = threading.Event()
         self.process_loop = threading.Event()
-        self.json_output = {JSON_BASE_KEY: []}
 
-    def process_traces(self):
-        for trace_path in self.trace_input_paths:
-            if os.path.isfile(trace_path):
-                self.traceappnames_api = None
-                self.api_skip.clear()
-
-                logger.info(f'Processing trace: {trace_path}')
-
-                self.binary_name_raw, file_extension = os.path.basename(trace_path).rsplit('.', 1)
-                if file_extension == 'zst':
-                    trace_path_final = os.path.join(os.path.dirname(trace_path), self.binary_name_raw)
-                    self.binary_name_raw = self.binary_name = self.binary_name_raw.rsplit('.', 1)[0]
-                    self.compressed_trace = True
-                else:
-                    trace_path_final = trace_path
-                    self.binary_name = self.binary_name_raw
-                # workaround for renamed generic game/Game.exe apitraces
-                if (self.binary_name_raw.upper().startswith('GAME') and
-                    self.binary_name_raw not in TRACE_NAME_EXCEPTION_LIST):
-                    self.binary_name = self.binary_name_raw[:4]
-                # workaround for games with multiple editions or that support multiple APIs
-                elif (self.binary_name_raw.endswith('_') and
-                      self.binary_name_raw not in TRACE_NAME_EXCEPTION_LIST):
-                    while self.binary_name.endswith('_'):
-                        self.binary_name = self.binary_name[:-1]
-
-                if self.application_name is not None:
-                    logger.info(f'Using application name: {self.application_name}')
-                elif TRACEAPPNAMES_IS_IMPORTED:
-                    try:
-                        self.application_name = TraceAppNames.get(self.binary_name_raw)[0]
-                        if self.application_name is not None:
-                            logger.info(f'Application name found in traceappnames repository: {self.application_name}')
-                    except TypeError:
-                        pass
-                # use the binary name as an application name if it is undertermined at this point
-                if self.application_name is None:
-                    logger.info(f'Defaulting application name to: {self.binary_name}')
-                    self.application_name = self.binary_name
-
-                if self.application_link is not None:
-                    logger.info(f'Using application link: {self.application_link}')
-                elif TRACEAPPNAMES_IS_IMPORTED:
-                    try:
-                        self.application_link = TraceAppNames.get(self.binary_name_raw)[1]
-                        if self.application_link is not None:
-                            logger.info(f'Application link found in traceappnames repository: {self.application_link}')
-                    except TypeError:
-                        pass
-
-                if TRACEAPPNAMES_IS_IMPORTED:
-                    try:
-                        self.traceappnames_api = TraceAppNames.get(self.binary_name_raw)[2]
-                        if self.traceappnames_api is not None:
-                            logger.info(f'Application API found in traceappnames repository: {self.traceappnames_api}')
-                    except TypeError:
-                        pass
-
-                    if self.apis_to_skip is not None and self.traceappnames_api in self.apis_to_skip:
-                        logger.info('Skipped trace due to API filter')
-                        continue
+    @classmethod
+    def trace_file_size(cls, trace_path):
+        try:
+            return os.path.getsize(trace_path)
+        except OSError:
+            return 0
+
+    def process_trace(self, trace_path):
+        trace_result = None
+
+        if os.path.isfile(trace_path):
+            self.application_name = self.default_application_name
+            self.application_link = self.default_application_link
+            self.traceappnames_api = None
+            self.api_skip.clear()
+
+            logger.info(f'Processing trace: {trace_path}')
+
+            self.binary_name_raw, file_extension = os.path.basename(trace_path).rsplit('.', 1)
+            if file_extension == 'zst':
+                trace_path_final = os.path.join(os.path.dirname(trace_path), self.binary_name_raw)
+                self.binary_name_raw = self.binary_name = self.binary_name_raw.rsplit('.', 1)[0]
+                self.compressed_trace = True
+            else:
+                trace_path_final = trace_path
+                self.binary_name = self.binary_name_raw
+            # workaround for renamed generic game/Game.exe apitraces
+            if (self.binary_name_raw.upper().startswith('GAME') and
+                self.binary_name_raw not in TRACE_NAME_EXCEPTION_LIST):
+                self.binary_name = self.binary_name_raw[:4]
+            # workaround for games with multiple editions or that support multiple APIs
+            elif (self.binary_name_raw.endswith('_') and
+                  self.binary_name_raw not in TRACE_NAME_EXCEPTION_LIST):
+                while self.binary_name.endswith('_'):
+                    self.binary_name = self.binary_name[:-1]
+
+            if self.application_name is not None:
+                logger.info(f'Using application name: {self.application_name}')
+            elif TRACEAPPNAMES_IS_IMPORTED:
+                try:
+                    self.application_name = TraceAppNames.get(self.binary_name_raw)[0]
+                    if self.application_name is not None:
+                        logger.info(f'Application name found in traceappnames repository: {self.application_name}')
+                except TypeError:
+                    pass
+            # use the binary name as an application name if it is undertermined at this point
+            if self.application_name is None:
+                logger.info(f'Defaulting application name to: {self.binary_name}')
+                self.application_name = self.binary_name
+
+            if self.application_link is not None:
+                logger.info(f'Using application link: {self.application_link}')
+            elif TRACEAPPNAMES_IS_IMPORTED:
+                try:
+                    self.application_link = TraceAppNames.get(self.binary_name_raw)[1]
+                    if self.application_link is not None:
+                        logger.info(f'Application link found in traceappnames repository: {self.application_link}')
+                except TypeError:
+                    pass
 
-                if self.compressed_trace:
-                    try:
-                        logger.info('Decompressing trace file...')
-                        subprocess.run(['zstd', '-d', '-f', trace_path, '-o', trace_path_final],
-                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-                                       check=True)
-                    except subprocess.CalledProcessError:
-                        logger.critical(f'Unable to decompress trace file: {trace_path}')
-                        raise SystemExit(6)
-
-                # mind the -v (verbose) flag here, otherwise apitrace dump will skip various calls :/
-                if self.use_wine_for_apitrace:
-                    subprocess_params = ('wine', self.apitrace_path, 'dump', '-v', '--color=never', trace_path_final)
-                else:
-                    subprocess_params = (self.apitrace_path, 'dump', '-v', '--color=never', trace_path_final)
+            if TRACEAPPNAMES_IS_IMPORTED:
+                try:
+                    self.traceappnames_api = TraceAppNames.get(self.binary_name_raw)[2]
+                    if self.traceappnames_api is not None:
+                        logger.info(f'Application API found in traceappnames repository: {self.traceappnames_api}')
+                except TypeError:
+                    pass
 
-                process_thread = threading.Thread(target=self.trace_parse_worker, args=())
+                if self.apis_to_skip is not None and self.traceappnames_api in self.apis_to_skip:
+                    logger.info('Skipped trace due to API filter')
+                    return None
 
+            if self.compressed_trace:
                 try:
-                    if self.traceappnames_api is not None and self.force_api_level:
-                        self.api = TRACE_API_OVERRIDES.get(self.binary_name_raw, None)
-                        if self.api is not None:
-                            logger.info(f'Forcing traceappnames API level: {self.api}')
-
-                    # API detection prepass
-                    if self.api is None:
-                        api_prepass_subprocess = subprocess.Popen(subprocess_params, bufsize=0,
-                                                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
-                                                                  text=True)
-
-                        while self.api == None:
-                            trace_chunk_line = api_prepass_subprocess.stdout.readline()
-
-                            if trace_chunk_line == '' and api_prepass_subprocess.poll() is not None:
-                                logger.critical('Unable to detected any supported API level')
-                                raise SystemExit(7)
-                            else:
-                                self.trace_api_prepass(trace_chunk_line)
+                    logger.info('Decompressing trace file...')
+                    subprocess.run(['zstd', '-d', '-f', trace_path, '-o', trace_path_final],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   check=True)
+                except subprocess.CalledProcessError:
+                    logger.critical(f'Unable to decompress trace file: {trace_path}')
+                    raise SystemExit(6)
+
+            # mind the -v (verbose) flag here, otherwise apitrace dump will skip various calls :/
+            if self.use_wine_for_apitrace:
+                subprocess_params = ('wine', self.apitrace_path, 'dump', '-v', '--color=never', trace_path_final)
+            else:
+                subprocess_params = (self.apitrace_path, 'dump', '-v', '--color=never', trace_path_final)
 
-                        api_prepass_subprocess.terminate()
+            process_thread = threading.Thread(target=self.trace_parse_worker, args=())
 
-                    # API based parsing skip logic
-                    if self.traceappnames_api is None and self.apis_to_skip is not None and self.api in self.apis_to_skip:
-                        self.api_skip.set()
+            try:
+                if self.traceappnames_api is not None and self.force_api_level:
+                    self.api = TRACE_API_OVERRIDES.get(self.binary_name_raw, None)
+                    if self.api is not None:
+                        logger.info(f'Forcing traceappnames API level: {self.api}')
+
+                # API detection prepass
+                if self.api is None:
+                    api_prepass_subprocess = subprocess.Popen(subprocess_params, bufsize=TRACE_DUMP_BUFFER_SIZE,
+                                                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                                              text=True)
+
+                    while self.api == None:
+                        trace_chunk_line = api_prepass_subprocess.stdout.readline()
+
+                        if trace_chunk_line == '' and api_prepass_subprocess.poll() is not None:
+                            logger.critical('Unable to detected any supported API level')
+                            raise SystemExit(7)
+                        else:
+                            self.trace_api_prepass(trace_chunk_line)
 
-                    # actual trace parsing, with a determined API
-                    else:
-                        self.process_loop.set()
+                    api_prepass_subprocess.terminate()
 
-                        # start trace processing thread
-                        process_thread.daemon = True
-                        process_thread.start()
+                # API based parsing skip logic
+                if self.traceappnames_api is None and self.apis_to_skip is not None and self.api in self.apis_to_skip:
+                    self.api_skip.set()
 
-                        self.parse_loop.set()
+                # actual trace parsing, with a determined API
+                else:
+                    self.process_loop.set()
 
-                        trace_chunk_line_count = 0
-                        trace_chunk_lines = []
+                    # start trace processing thread
+                    process_thread.daemon = True
+                    process_thread.start()
 
-                        trace_dump_subprocess = subprocess.Popen(subprocess_params, bufsize=0,
-                                                                 stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
-                                                                 text=True)
+                    self.parse_loop.set()
 
-                        while self.parse_loop.is_set():
-                            trace_chunk_line = trace_dump_subprocess.stdout.readline()
+                    trace_dump_subprocess = subprocess.Popen(subprocess_params, bufsize=TRACE_DUMP_BUFFER_SIZE,
+                                                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                                             text=True)
 
-                            if trace_chunk_line == '' and trace_dump_subprocess.poll() is not None:
-                                # flush any pending chunk lines
-                                if len(trace_chunk_lines):
-                                    self.process_queue.put(trace_chunk_lines)
-                                self.parse_loop.clear()
-                                logger.info('End of trace dump output detected')
-                            else:
-                                trace_chunk_line_count += 1
-                                trace_chunk_lines.append(trace_chunk_line)
+                    while self.parse_loop.is_set():
+                        # read a whole chunk of lines at a time from the buffered output
+                        trace_chunk_lines = list(islice(trace_dump_subprocess.stdout, TRACE_PARSE_CHUNK_CALLS))
 
-                                if trace_chunk_line_count == TRACE_PARSE_CHUNK_CALLS:
-                                    self.process_queue.put(trace_chunk_lines)
-                                    trace_chunk_line_count = 0
-                                    trace_chunk_lines = []
+                        if len(trace_chunk_lines) > 0:
+                            self.process_queue.put(trace_chunk_lines)
 
-                except:
-                    logger.critical('Critical exception during the apitrace dump process')
-                    # uncomment for debugging purposes only
-                    #logger.error(traceback.format_exc())
-                    self.parse_loop.clear()
-
-                # signal the termination of the processing thread
-                self.process_loop.clear()
-                # ensure the process_queue is drained
-                self.process_queue.join()
-                try:
-                    # ensure the processsing thread has halted
-                    process_thread.join()
-                except RuntimeError:
-                    pass
+                        # a partial (or empty) chunk can only mean the end of the output
+                        if len(trace_chunk_lines) < TRACE_PARSE_CHUNK_CALLS:
+                            self.parse_loop.clear()
+                            logger.info('End of trace dump output detected')
 
-                if not self.api_skip.is_set():
-                    if not self.shader_dump:
-                        return_dictionary = {}
-                        return_dictionary['binary_name'] = self.binary_name
-                        return_dictionary['name'] = self.application_name
-                        if self.application_link is not None:
-                            return_dictionary['link'] = self.application_link
-                        if len(self.api_call_dictionary) > 0:
-                            return_dictionary['api_calls'] = self.api_call_dictionary
-                        if len(self.vendor_hack_check_dictionary) > 0:
-                            return_dictionary['vendor_hack_checks'] = self.vendor_hack_check_dictionary
-                        if len(self.device_type_dictionary) > 0:
-                            return_dictionary['device_types'] = self.device_type_dictionary
-                        if len(self.present_parameter_dictionary) > 0:
-                            return_dictionary['present_parameters'] = self.present_parameter_dictionary
-                        if len(self.present_parameter_flag_dictionary) > 0:
-                            return_dictionary['present_parameter_flags'] = self.present_parameter_flag_dictionary
-                        if len(self.behavior_flag_dictionary) > 0:
-                            return_dictionary['behavior_flags'] = self.behavior_flag_dictionary
-                        if len(self.render_state_dictionary) > 0:
-                            return_dictionary['render_states'] = self.render_state_dictionary
-                        if len(self.query_type_dictionary) > 0:
-                            return_dictionary['query_types'] = self.query_type_dictionary
-                        if len(self.lock_flag_dictionary) > 0:
-                            return_dictionary['lock_flags'] = self.lock_flag_dictionary
-                        if len(self.shader_version_dictionary) > 0:
-                            return_dictionary['shader_versions'] = self.shader_version_dictionary
-                        if len(self.pixel_format_dictionary) > 0:
-                            return_dictionary['pixel_formats'] = self.pixel_format_dictionary
-                        if len(self.format_dictionary) > 0:
-                            return_dictionary['formats'] = self.format_dictionary
-                        if len(self.vendor_hack_dictionary) > 0:
-                            return_dictionary['vendor_hacks'] = self.vendor_hack_dictionary
-                        if len(self.pool_dictionary) > 0:
-                            return_dictionary['pools'] = self.pool_dictionary
-                        if len(self.device_flag_dictionary) > 0:
-                            return_dictionary['device_flags'] = self.device_flag_dictionary
-                        if len(self.swapchain_parameter_dictionary) > 0:
-                            return_dictionary['swapchain_parameters'] = self.swapchain_parameter_dictionary
-                        if len(self.swapchain_buffer_usage_dictionary) > 0:
-                            return_dictionary['swapchain_buffer_usage'] = self.swapchain_buffer_usage_dictionary
-                        if len(self.swapchain_flag_dictionary) > 0:
-                            return_dictionary['swapchain_flags'] = self.swapchain_flag_dictionary
-                        if len(self.feature_level_dictionary) > 0:
-                            return_dictionary['feature_levels'] = self.feature_level_dictionary
-                        if len(self.rastizer_state_dictionary) > 0:
-                            return_dictionary['rastizer_states'] = self.rastizer_state_dictionary
-                        if len(self.blend_state_dictionary) > 0:
-                            return_dictionary['blend_states'] = self.blend_state_dictionary
-                        if len(self.usage_dictionary) > 0:
-                            return_dictionary['usage'] = self.usage_dictionary
-                        if len(self.bind_flag_dictionary) > 0:
-                            return_dictionary['bind_flags'] = self.bind_flag_dictionary
-                        if len(self.cooperative_level_flag_dictionary) > 0:
-                            return_dictionary['cooperative_level_flags'] = self.cooperative_level_flag_dictionary
-                        if len(self.flip_flag_dictionary) > 0:
-                            return_dictionary['flip_flags'] = self.flip_flag_dictionary
-                        if len(self.draw_flag_dictionary) > 0:
-                            return_dictionary['draw_flags'] = self.draw_flag_dictionary
-                        if len(self.process_vertices_flag_dictionary) > 0:
-                            return_dictionary['process_vertices_flags'] = self.process_vertices_flag_dictionary
-                        if len(self.surface_cap_dictionary) > 0:
-                            return_dictionary['surface_caps'] = self.surface_cap_dictionary
-                        if len(self.vertex_buffer_cap_dictionary) > 0:
-                            return_dictionary['vertex_buffer_caps'] = self.vertex_buffer_cap_dictionary
-                        if len(self.texture_map_mode_dictionary) > 0:
-                            return_dictionary['texture_map_modes'] = self.texture_map_mode_dictionary
-
-                        self.json_output[JSON_BASE_KEY].append(return_dictionary)
-
-                    elif len(self.shader_dump_call_array) > 0:
-                        logger.info(f'Dumping {len(self.shader_dump_call_array)} shader binaries...')
-
-                        # split the shader dump call numbers into strings of a size equal to SHADER_DUMPS_CALL_CHUNK_SIZE
-                        # in order to circumvent the "OSError: [Errno 7] Argument list too long" exception on shader heavy apitraces
-                        shader_dump_call_strings = [','.join(self.shader_dump_call_array[chunk:chunk + SHADER_DUMPS_CALL_CHUNK_SIZE])
-                                                    for chunk in range(0, len(self.shader_dump_call_array), SHADER_DUMPS_CALL_CHUNK_SIZE)]
-                        current_path = os.getcwd()
-                        trace_path_final_absolute = os.path.join(current_path, trace_path_final)
-                        dump_path_final_absolute = os.path.join(current_path, SHADER_DUMPS_FOLDER_NAME)
-
-                        for shader_dump_call_string in shader_dump_call_strings:
-                            logger.debug(f'Dumping shader binaries on calls: {shader_dump_call_string}')
-
-                            if self.use_wine_for_apitrace:
-                                subprocess_params = ('wine', self.apitrace_path, 'dump', '--blob', f'--calls={shader_dump_call_string}', trace_path_final_absolute)
-                            else:
-                                subprocess_params = (self.apitrace_path, 'dump', '--blob', f'--calls={shader_dump_call_string}', trace_path_final_absolute)
+            except:
+                logger.critical('Critical exception during the apitrace dump process')
+                # uncomment for debugging purposes only
+                #logger.error(traceback.format_exc())
+                self.parse_loop.clear()
 
-                            subprocess.run(subprocess_params, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-                                            cwd=dump_path_final_absolute, check=True)
+            # signal the termination of the processing thread
+            self.process_loop.clear()
+            # ensure the process_queue is drained
+            self.process_queue.join()
+            try:
+                # ensure the processsing thread has halted
+                process_thread.join()
+            except RuntimeError:
+                pass
 
-                    logger.info('Trace processing complete')
-                else:
-                    logger.info('Skipped trace due to API filter')
+            if not self.api_skip.is_set():
+                if not self.shader_dump:
+                    return_dictionary = {}
+                    return_dictionary['binary_name'] = self.binary_name
+                    return_dictionary['name'] = self.application_name
+                    if self.application_link is not None:
+                        return_dictionary['link'] = self.application_link
+                    if len(self.api_call_dictionary) > 0:
+                        return_dictionary['api_calls'] = self.api_call_dictionary
+                    if len(self.vendor_hack_check_dictionary) > 0:
+                        return_dictionary['vendor_hack_checks'] = self.vendor_hack_check_dictionary
+                    if len(self.device_type_dictionary) > 0:
+                        return_dictionary['device_types'] = self.device_type_dictionary
+                    if len(self.present_parameter_dictionary) > 0:
+                        return_dictionary['present_parameters'] = self.present_parameter_dictionary
+                    if len(self.present_parameter_flag_dictionary) > 0:
+                        return_dictionary['present_parameter_flags'] = self.present_parameter_flag_dictionary
+                    if len(self.behavior_flag_dictionary) > 0:
+                        return_dictionary['behavior_flags'] = self.behavior_flag_dictionary
+                    if len(self.render_state_dictionary) > 0:
+                        return_dictionary['render_states'] = self.render_state_dictionary
+                    if len(self.query_type_dictionary) > 0:
+                        return_dictionary['query_types'] = self.query_type_dictionary
+                    if len(self.lock_flag_dictionary) > 0:
+                        return_dictionary['lock_flags'] = self.lock_flag_dictionary
+                    if len(self.shader_version_dictionary) > 0:
+                        return_dictionary['shader_versions'] = self.shader_version_dictionary
+                    if len(self.pixel_format_dictionary) > 0:
+                        return_dictionary['pixel_formats'] = self.pixel_format_dictionary
+                    if len(self.format_dictionary) > 0:
+                        return_dictionary['formats'] = self.format_dictionary
+                    if len(self.vendor_hack_dictionary) > 0:
+                        return_dictionary['vendor_hacks'] = self.vendor_hack_dictionary
+                    if len(self.pool_dictionary) > 0:
+                        return_dictionary['pools'] = self.pool_dictionary
+                    if len(self.device_flag_dictionary) > 0:
+                        return_dictionary['device_flags'] = self.device_flag_dictionary
+                    if len(self.swapchain_parameter_dictionary) > 0:
+                        return_dictionary['swapchain_parameters'] = self.swapchain_parameter_dictionary
+                    if len(self.swapchain_buffer_usage_dictionary) > 0:
+                        return_dictionary['swapchain_buffer_usage'] = self.swapchain_buffer_usage_dictionary
+                    if len(self.swapchain_flag_dictionary) > 0:
+                        return_dictionary['swapchain_flags'] = self.swapchain_flag_dictionary
+                    if len(self.feature_level_dictionary) > 0:
+                        return_dictionary['feature_levels'] = self.feature_level_dictionary
+                    if len(self.rastizer_state_dictionary) > 0:
+                        return_dictionary['rastizer_states'] = self.rastizer_state_dictionary
+                    if len(self.blend_state_dictionary) > 0:
+                        return_dictionary['blend_states'] = self.blend_state_dictionary
+                    if len(self.usage_dictionary) > 0:
+                        return_dictionary['usage'] = self.usage_dictionary
+                    if len(self.bind_flag_dictionary) > 0:
+                        return_dictionary['bind_flags'] = self.bind_flag_dictionary
+                    if len(self.cooperative_level_flag_dictionary) > 0:
+                        return_dictionary['cooperative_level_flags'] = self.cooperative_level_flag_dictionary
+                    if len(self.flip_flag_dictionary) > 0:
+                        return_dictionary['flip_flags'] = self.flip_flag_dictionary
+                    if len(self.draw_flag_dictionary) > 0:
+                        return_dictionary['draw_flags'] = self.draw_flag_dictionary
+                    if len(self.process_vertices_flag_dictionary) > 0:
+                        return_dictionary['process_vertices_flags'] = self.process_vertices_flag_dictionary
+                    if len(self.surface_cap_dictionary) > 0:
+                        return_dictionary['surface_caps'] = self.surface_cap_dictionary
+                    if len(self.vertex_buffer_cap_dictionary) > 0:
+                        return_dictionary['vertex_buffer_caps'] = self.vertex_buffer_cap_dictionary
+                    if len(self.texture_map_mode_dictionary) > 0:
+                        return_dictionary['texture_map_modes'] = self.texture_map_mode_dictionary
+
+                    trace_result = return_dictionary
+
+                elif len(self.shader_dump_call_array) > 0:
+                    logger.info(f'Dumping {len(self.shader_dump_call_array)} shader binaries...')
+
+                    # split the shader dump call numbers into strings of a size equal to SHADER_DUMPS_CALL_CHUNK_SIZE
+                    # in order to circumvent the "OSError: [Errno 7] Argument list too long" exception on shader heavy apitraces
+                    shader_dump_call_strings = [','.join(self.shader_dump_call_array[chunk:chunk + SHADER_DUMPS_CALL_CHUNK_SIZE])
+                                                for chunk in range(0, len(self.shader_dump_call_array), SHADER_DUMPS_CALL_CHUNK_SIZE)]
+                    current_path = os.getcwd()
+                    trace_path_final_absolute = os.path.join(current_path, trace_path_final)
+                    dump_path_final_absolute = os.path.join(current_path, SHADER_DUMPS_FOLDER_NAME)
+
+                    for shader_dump_call_string in shader_dump_call_strings:
+                        logger.debug(f'Dumping shader binaries on calls: {shader_dump_call_string}')
+
+                        if self.use_wine_for_apitrace:
+                            subprocess_params = ('wine', self.apitrace_path, 'dump', '--blob', f'--calls={shader_dump_call_string}', trace_path_final_absolute)
+                        else:
+                            subprocess_params = (self.apitrace_path, 'dump', '--blob', f'--calls={shader_dump_call_string}', trace_path_final_absolute)
 
-                if self.compressed_trace:
-                    try:
-                        logger.info('Removing decompressed trace file...')
-                        os.remove(trace_path_final)
-                    except:
-                        logger.error(f'Unable to clean up trace: {trace_path_final}')
-
-                # reset state between processed traces
-                self.compressed_trace = False
-                self.binary_name_raw = None
-                self.binary_name = None
-                self.traceappnames_api = None
-                self.api = None
-                self.shader_dump_call_array = []
-                self.api_call_dictionary = {}
-                self.vendor_hack_check_dictionary = {}
-                self.device_type_dictionary = {}
-                self.behavior_flag_dictionary = {}
-                self.present_parameter_dictionary = {}
-                self.present_parameter_flag_dictionary = {}
-                self.render_state_dictionary = {}
-                self.query_type_dictionary = {}
-                self.lock_flag_dictionary = {}
-                self.shader_version_dictionary = {}
-                self.pixel_format_dictionary = {}
-                self.format_dictionary = {}
-                self.vendor_hack_dictionary = {}
-                self.pool_dictionary = {}
-                self.device_flag_dictionary = {}
-                self.swapchain_parameter_dictionary = {}
-                self.swapchain_buffer_usage_dictionary = {}
-                self.swapchain_flag_dictionary = {}
-                self.feature_level_dictionary = {}
-                self.rastizer_state_dictionary = {}
-                self.blend_state_dictionary = {}
-                self.usage_dictionary = {}
-                self.bind_flag_dictionary = {}
-                self.cooperative_level_flag_dictionary = {}
-                self.flip_flag_dictionary = {}
-                self.draw_flag_dictionary = {}
-                self.process_vertices_flag_dictionary = {}
-                self.surface_cap_dictionary = {}
-                self.vertex_buffer_cap_dictionary = {}
-                self.texture_map_mode_dictionary = {}
+                        subprocess.run(subprocess_params, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                        cwd=dump_path_final_absolute, check=True)
 
+                logger.info('Trace processing complete')
             else:
-                logger.warning(f'File not found, skipping: {trace_path}')
+                logger.info('Skipped trace due to API filter')
+
+            if self.compressed_trace:
+                try:
+                    logger.info('Removing decompressed trace file...')
+                    os.remove(trace_path_final)
+                except:
+                    logger.error(f'Unable to clean up trace: {trace_path_final}')
+
+            # reset state between processed traces
+            self.compressed_trace = False
+            self.binary_name_raw = None
+            self.binary_name = None
+            self.traceappnames_api = None
+            self.api = None
+            self.shader_dump_call_array = []
+            self.api_call_dictionary = Counter()
+            self.vendor_hack_check_dictionary = Counter()
+            self.device_type_dictionary = Counter()
+            self.behavior_flag_dictionary = Counter()
+            self.present_parameter_dictionary = Counter()
+            self.present_parameter_flag_dictionary = Counter()
+            self.render_state_dictionary = Counter()
+            self.query_type_dictionary = Counter()
+            self.lock_flag_dictionary = Counter()
+            self.shader_version_dictionary = Counter()
+            self.pixel_format_dictionary = Counter()
+            self.format_dictionary = Counter()
+            self.vendor_hack_dictionary = Counter()
+            self.pool_dictionary = Counter()
+            self.device_flag_dictionary = Counter()
+            self.swapchain_parameter_dictionary = Counter()
+            self.swapchain_buffer_usage_dictionary = Counter()
+            self.swapchain_flag_dictionary = Counter()
+            self.feature_level_dictionary = Counter()
+            self.rastizer_state_dictionary = Counter()
+            self.blend_state_dictionary = Counter()
+            self.usage_dictionary = Counter()
+            self.bind_flag_dictionary = Counter()
+            self.cooperative_level_flag_dictionary = Counter()
+            self.flip_flag_dictionary = Counter()
+            self.draw_flag_dictionary = Counter()
+            self.process_vertices_flag_dictionary = Counter()
+            self.surface_cap_dictionary = Counter()
+            self.vertex_buffer_cap_dictionary = Counter()
+            self.texture_map_mode_dictionary = Counter()
+
+        else:
+            logger.warning(f'File not found, skipping: {trace_path}')
+
+        return trace_result
+
+    def process_traces(self):
+        # only count the CPUs this process is actually allowed to run on
+        if hasattr(os, 'sched_getaffinity'):
+            trace_workers = min(len(os.sched_getaffinity(0)), len(self.trace_input_paths))
+        else:
+            trace_workers = min(os.cpu_count() or 1, len(self.trace_input_paths))
+
+        # shader dumps all end up in the same folder, so process those one at a time,
+        # same as when there is only a single trace or a single CPU to work with
+        if self.shader_dump or trace_workers < 2:
+            trace_results = [self.process_trace(trace_path) for trace_path in self.trace_input_paths]
+        else:
+            logger.info(f'Processing {len(self.trace_input_paths)} traces using {trace_workers} workers')
+
+            # start with the largest traces, so that they don't end up holding up the last worker
+            trace_indexes = sorted(range(len(self.trace_input_paths)),
+                                   key=lambda trace_index: self.trace_file_size(self.trace_input_paths[trace_index]),
+                                   reverse=True)
+
+            trace_indexes_pending = iter(trace_indexes)
+            trace_results = [None] * len(self.trace_input_paths)
+
+            with ProcessPoolExecutor(max_workers=trace_workers, initializer=trace_worker_init) as executor:
+                trace_futures = {}
+                try:
+                    # only hand out as many traces as there are workers, so that
+                    # nothing is left queued up behind a failed or a halted run
+                    for trace_index in islice(trace_indexes_pending, trace_workers):
+                        trace_futures[executor.submit(self.process_trace, self.trace_input_paths[trace_index])] = trace_index
+
+                    while len(trace_futures) > 0:
+                        trace_futures_done, _ = wait(trace_futures, return_when=FIRST_COMPLETED)
+
+                        for trace_future in trace_futures_done:
+                            # keep the export in the same order as the trace inputs,
+                            # and raise the exception of a failed trace right away
+                            trace_results[trace_futures.pop(trace_future)] = trace_future.result()
+
+                            trace_index = next(trace_indexes_pending, None)
+                            if trace_index is not None:
+                                trace_futures[executor.submit(self.process_trace, self.trace_input_paths[trace_index])] = trace_index
+                # a signal or a failed trace should not wait on any other traces
+                except BaseException as exception:
+                    for trace_future in trace_futures:
+                        trace_future.cancel()
+                    # there's no public way of stopping traces that are already being processed,
+                    # and the workers ignore SIGINT, so terminate them before the executor exits
+                    trace_worker_processes = list(executor._processes.values())
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    for trace_worker_process in trace_worker_processes:
+                        trace_worker_process.terminate()
+
+                    # a halt due to a signal still leaves the processing incomplete
+                    if isinstance(exception, SystemExit) and not exception.code:
+                        raise SystemExit(8)
+                    raise
+
+        for trace_result in trace_results:
+            if trace_result is not None:
+                self.json_output[JSON_BASE_KEY].append(trace_result)
 
         # a dictionary length of 2 would mean only the name and binary_name
         # are determined, so no apitrace data was actually parsed and saved
         if (not self.shader_dump and len(self.json_output[JSON_BASE_KEY]) > 0
                                  and len(self.json_output[JSON_BASE_KEY][0]) > 2):
-            json_export = json.dumps(self.json_output, sort_keys=True, indent=4,
-                                     separators=(',', ': '), ensure_ascii=False)
-            logger.debug(f'JSON export output is: {json_export}')
+            if logger.isEnabledFor(logging.DEBUG):
+                json_export = json.dumps(self.json_output, sort_keys=True, indent=4,
+                                         separators=(',', ': '), ensure_ascii=False)
+                logger.debug(f'JSON export output is: {json_export}')
 
             if os.path.exists(self.json_export_path):
                 backup_path = ''.join((self.json_export_path, '.bak'))
                 shutil.copy2(self.json_export_path, backup_path)
                 logger.info(f'Existing JSON export backed up as: {backup_path}')
 
+            # write the export directly, without building the whole JSON string in memory first
             with open(self.json_export_path, 'w') as file:
-                file.write(json_export)
+                json.dump(self.json_output, file, sort_keys=True, indent=4,
+                          separators=(',', ': '), ensure_ascii=False)
 
             logger.info('JSON export complete')
 
@@ -888,29 +989,40 @@ class TraceStats:
             # the trace number and later on the api call name
             split_line = trace_line.split(maxsplit=2)
 
-            for key, value in API_ENTRY_CALLS.items():
-                if key in split_line[1]:
-                    self.api = value
+            api_entry_call = API_ENTRY_CALLS_PATTERN.search(split_line[1])
 
-                    if self.traceappnames_api is not None and self.traceappnames_api != self.api:
-                        api_override = TRACE_API_OVERRIDES.get(self.binary_name_raw, None)
-                        if api_override is None:
-                            logger.warning(f'Traceappnames API value is mismatched: {self.api}')
-                        elif self.traceappnames_api == api_override:
-                            logger.info(f'Known API value override detected: {api_override}')
-                        else:
-                            logger.error('Unexpected API override value')
-                    else:
-                        logger.info(f'Detected API: {self.api}')
+            if api_entry_call is not None:
+                self.api = API_ENTRY_CALLS[api_entry_call.group()]
 
-                    break
+                if self.traceappnames_api is not None and self.traceappnames_api != self.api:
+                    api_override = TRACE_API_OVERRIDES.get(self.binary_name_raw, None)
+                    if api_override is None:
+                        logger.warning(f'Traceappnames API value is mismatched: {self.api}')
+                    elif self.traceappnames_api == api_override:
+                        logger.info(f'Known API value override detected: {api_override}')
+                    else:
+                        logger.error('Unexpected API override value')
+                else:
+                    logger.info(f'Detected API: {self.api}')
 
     def trace_parse_worker(self):
+        # the API level is fixed for the whole trace, so
+        # only check it once, not for every parsed line
+        api_ddraw = self.api in ('D3D7', 'D3D6', 'D3D5', 'D3D3')
+        api_d3d5_and_up = self.api in ('D3D7', 'D3D6', 'D3D5')
+        api_d3d6_and_up = self.api in ('D3D7', 'D3D6')
+        api_d3d8 = self.api == 'D3D8'
+        api_d3d9 = self.api in ('D3D9Ex', 'D3D9')
+        api_d3d8_d3d9 = api_d3d8 or api_d3d9
+        api_d3d10_d3d11 = self.api in ('D3D10', 'D3D11')
+
         while self.process_loop.is_set() or not self.process_queue.empty():
-            logger.debug(f'Items in the processing queue: {self.process_queue.qsize()}')
+            logger.debug('Items in the processing queue: %s', self.process_queue.qsize())
 
             try:
                 trace_chunk_lines = self.process_queue.get(block=True, timeout=5)
+                # API calls are counted in bulk, once the whole chunk is parsed
+                trace_chunk_calls = []
                 trace_call_counter = 0
                 shader_call_context = False
 
@@ -938,756 +1050,502 @@ class TraceStats:
                                    trace_line.startswith(HULL_SHADER_IDENTIFIER))
 
                     if not shader_line:
+                        # skip lines without any API calls before doing any splitting,
+                        # as these will usually be (numbered) memcpy lines
+                        if (API_ENTRY_CALL_IDENTIFIER not in trace_line and
+                            API_BASE_CALLS_PATTERN.search(trace_line) is None):
+                            logger.debug('Skipped parsing of line: %s', trace_line)
+                            continue
+
                         # no need to do more than 2 splits, as we only need
                         # the trace number and later on the api call name
                         split_line = trace_line.split(maxsplit=2)
 
-                        # unnumbered lines will raise a ValueError
-                        try:
-                            trace_call_counter = int(split_line[0])
-                            logger.debug(f'Found call count: {trace_call_counter}')
-                        except ValueError:
-                            logger.debug(f'Skipped parsing of line: {trace_line}')
+                        # skip unnumbered lines without going through int() exceptions
+                        if not split_line[0].isdecimal():
+                            logger.debug('Skipped parsing of line: %s', trace_line)
                             continue
+
+                        trace_call_counter = int(split_line[0])
+                        logger.debug('Found call count: %s', trace_call_counter)
                     else:
                         split_line = None
 
-                    if (shader_line or API_ENTRY_CALL_IDENTIFIER in trace_line or
-                        any(api_base_call in trace_line for api_base_call in API_BASE_CALLS.keys())):
-                        # parse API calls
-                        if not shader_line:
-                            call = split_line[1].split('(', 1)[0]
-                            logger.debug(f'Found call: {call}')
+                    # parse API calls
+                    if not shader_line:
+                        call = split_line[1].split('(', 1)[0]
+                        logger.debug('Found call: %s', call)
 
-                            existing_value = self.api_call_dictionary.get(call, 0)
-                            self.api_call_dictionary[call] = existing_value + 1
-                        else:
-                            # line starting with shader specific whitespace (not an actual call)
-                            call = ''
-
-                        if self.api =='D3D7' or self.api == 'D3D6' or self.api == 'D3D5' or self.api == 'D3D3':
-                            if COOPERATIVE_LEVEL_FLAGS_CALL in call:
-                                logger.debug(f'Found cooperative level flags on line: {trace_line}')
-
-                                cooperative_level_flags_start = trace_line.find(COOPERATIVE_LEVEL_FLAGS_IDENTIFIER) + COOPERATIVE_LEVEL_FLAGS_IDENTIFIER_LENGTH
-                                cooperative_level_flags = trace_line[cooperative_level_flags_start:trace_line.find(COOPERATIVE_LEVEL_FLAGS_IDENTIFIER_END,
-                                                                                                                   cooperative_level_flags_start)].strip()
-                                cooperative_level_flags = cooperative_level_flags.split(COOPERATIVE_LEVEL_FLAGS_SPLIT_DELIMITER)
-
-                                for cooperative_level_flag in cooperative_level_flags:
-                                    cooperative_level_flag_stripped = cooperative_level_flag.strip()
-                                    existing_value = self.cooperative_level_flag_dictionary.get(cooperative_level_flag_stripped, 0)
-                                    self.cooperative_level_flag_dictionary[cooperative_level_flag_stripped] = existing_value + 1
-
-                            elif SURFACE_CAPS_CALL in call:
-                                logger.debug(f'Found surface caps and pixel format flags on line: {trace_line}')
-
-                                # dwCaps
-                                if SURFACE_CAPS_SKIP_IDENTIFIER not in trace_line:
-                                    surface_caps_start = trace_line.find(SURFACE_CAPS_IDENTIFIER) + SURFACE_CAPS_IDENTIFIER_LENGTH
-                                    surface_caps = trace_line[surface_caps_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                 surface_caps_start)].strip()
-                                    surface_caps = surface_caps.split(SURFACE_CAPS_SPLIT_DELIMITER)
-
-                                    for surface_cap in surface_caps:
-                                        # IDirectDraw::CreateSurface and IDirectDraw2::CreateSurface calls
-                                        # will have a dwCaps field which will end in '}}', so strip that out
-                                        surface_cap_stripped = surface_cap.replace('}}', '').strip()
-                                        existing_value = self.surface_cap_dictionary.get(surface_cap_stripped, 0)
-                                        self.surface_cap_dictionary[surface_cap_stripped] = existing_value + 1
-
-                                # dwCaps2
-                                if SURFACE_CAPS2_SKIP_IDENTIFIER not in trace_line:
-                                    surface_caps2_start = trace_line.find(SURFACE_CAPS2_IDENTIFIER)
+                        trace_chunk_calls.append(call)
+                    else:
+                        # line starting with shader specific whitespace (not an actual call)
+                        call = ''
+
+                    if api_ddraw:
+                        if COOPERATIVE_LEVEL_FLAGS_CALL in call:
+                            logger.debug('Found cooperative level flags on line: %s', trace_line)
+
+                            cooperative_level_flags_start = trace_line.find(COOPERATIVE_LEVEL_FLAGS_IDENTIFIER) + COOPERATIVE_LEVEL_FLAGS_IDENTIFIER_LENGTH
+                            cooperative_level_flags = trace_line[cooperative_level_flags_start:trace_line.find(COOPERATIVE_LEVEL_FLAGS_IDENTIFIER_END,
+                                                                                                               cooperative_level_flags_start)].strip()
+                            cooperative_level_flags = cooperative_level_flags.split(COOPERATIVE_LEVEL_FLAGS_SPLIT_DELIMITER)
 
+                            for cooperative_level_flag in cooperative_level_flags:
+                                cooperative_level_flag_stripped = cooperative_level_flag.strip()
+                                self.cooperative_level_flag_dictionary[cooperative_level_flag_stripped] += 1
+
+                        elif SURFACE_CAPS_CALL in call:
+                            logger.debug('Found surface caps and pixel format flags on line: %s', trace_line)
+
+                            # dwCaps
+                            if SURFACE_CAPS_SKIP_IDENTIFIER not in trace_line:
+                                surface_caps_start = trace_line.find(SURFACE_CAPS_IDENTIFIER) + SURFACE_CAPS_IDENTIFIER_LENGTH
+                                surface_caps = trace_line[surface_caps_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                             surface_caps_start)].strip()
+                                surface_caps = surface_caps.split(SURFACE_CAPS_SPLIT_DELIMITER)
+
+                                for surface_cap in surface_caps:
                                     # IDirectDraw::CreateSurface and IDirectDraw2::CreateSurface calls
-                                    # won't have a dwCaps2 field at all in ddsCaps, only dwCaps
-                                    if surface_caps2_start != -1:
-                                        surface_caps2_start += SURFACE_CAPS2_IDENTIFIER_LENGTH
-                                        surface_caps2 = trace_line[surface_caps2_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                    surface_caps2_start)].strip()
-                                        surface_caps2 = surface_caps2.split(SURFACE_CAPS_SPLIT_DELIMITER)
-
-                                        for surface_cap2 in surface_caps2:
-                                            surface_cap2_stripped = surface_cap2.strip()
-                                            existing_value = self.surface_cap_dictionary.get(surface_cap2_stripped, 0)
-                                            self.surface_cap_dictionary[surface_cap2_stripped] = existing_value + 1
-
-                                # ddpfPixelFormat
-                                if PIXEL_FORMAT_IDENTIFIER in trace_line and PIXEL_FORMAT_SKIP_IDENTIFIER not in trace_line:
-                                    pixel_formats_start = trace_line.rfind(PIXEL_FORMAT_FLAGS_IDENTIFIER) + PIXEL_FORMAT_FLAGS_IDENTIFIER_LENGTH
-                                    pixel_formats = trace_line[pixel_formats_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                   pixel_formats_start)].strip()
-                                    if pixel_formats != PIXEL_FORMAT_FLAGS_SKIP_VALUE:
-                                        pixel_formats = pixel_formats.split(PIXEL_FORMAT_FLAGS_DELIMITER)
-
-                                        for pixel_format in pixel_formats:
-                                            pixel_format_stripped = pixel_format.strip()
-                                            if not pixel_format_stripped.startswith('0x'):
-                                                existing_value = self.pixel_format_dictionary.get(pixel_format_stripped, 0)
-                                                self.pixel_format_dictionary[pixel_format_stripped] = existing_value + 1
-                                            elif pixel_format_stripped not in PIXEL_FORMAT_KNOWN_BOGUS_VALUES:
-                                                logger.warning(f'Detected an unhandled pixel format flag: {pixel_format}')
-
-                                        if PIXEL_FORMAT_FOURCC_FLAG in trace_line:
-                                            pixel_format_fourcc_start = trace_line.find(PIXEL_FORMAT_IDENTIFIER_FOURCC) + PIXEL_FORMAT_IDENTIFIER_FOURCC_LENGTH
-                                            pixel_format_fourcc = trace_line[pixel_format_fourcc_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                                    pixel_format_fourcc_start)].strip()
-                                            # in some rare cases we might get an enumeration ending with a FOURCC
-                                            pixel_format_fourcc = pixel_format_fourcc.replace('}', '')
-
-                                            if pixel_format_fourcc.startswith('0x'):
-                                                if pixel_format_fourcc != PIXEL_FORMAT_FOURCC_SKIP_VALUE_HEX:
-                                                    try:
-                                                        pixel_format_fourcc_decoded = int(pixel_format_fourcc, 16).to_bytes(4, 'little').decode('ascii')
-                                                        if pixel_format_fourcc_decoded in DDRAW_FOURCC_FORMATS.values():
-                                                            logger.debug(f'Found FOURCC on line: {trace_line}')
-
-                                                            pixel_format_fourcc_decoded = ''.join((PIXEL_FORMAT_PREFIX, pixel_format_fourcc_decoded))
-
-                                                            existing_value = self.format_dictionary.get(pixel_format_fourcc_decoded, 0)
-                                                            self.format_dictionary[pixel_format_fourcc_decoded] = existing_value + 1
-                                                        elif pixel_format_fourcc not in PIXEL_FORMAT_KNOWN_BOGUS_FOURCC_VALUES:
-                                                            logger.warning(f'Detected an unhandled FOURCC: {pixel_format_fourcc}')
-                                                    except ValueError:
-                                                        logger.warning(f'Detected an unparsable FOURCC: {pixel_format_fourcc}')
-
-                                            elif pixel_format_fourcc.isdigit():
-                                                if pixel_format_fourcc in DDRAW_FOURCC_FORMATS.keys():
-                                                    logger.debug(f'Found FOURCC on line: {trace_line}')
-
-                                                    pixel_format_fourcc_lookup = DDRAW_FOURCC_FORMATS[pixel_format_fourcc]
-                                                    pixel_format_fourcc_decoded = ''.join((PIXEL_FORMAT_PREFIX, pixel_format_fourcc_lookup))
-                                                    existing_value = self.format_dictionary.get(pixel_format_fourcc_decoded, 0)
-                                                    self.format_dictionary[pixel_format_fourcc_decoded] = existing_value + 1
-
-                                                elif pixel_format_fourcc != PIXEL_FORMAT_FOURCC_SKIP_VALUE:
-                                                    logger.warning(f'Detected an unhandled FOURCC: {pixel_format_fourcc}')
-
-                                            # 0x can be found later in a decoded string, so make sure it's not present
-                                            elif pixel_format_fourcc.find('0x') == -1:
-                                                logger.debug(f'Found FOURCC on line: {trace_line}')
-
-                                                pixel_format_fourcc_stripped = pixel_format_fourcc.strip()
-                                                existing_value = self.format_dictionary.get(pixel_format_fourcc_stripped, 0)
-                                                self.format_dictionary[pixel_format_fourcc_stripped] = existing_value + 1
+                                    # will have a dwCaps field which will end in '}}', so strip that out
+                                    surface_cap_stripped = surface_cap.replace('}}', '').strip()
+                                    self.surface_cap_dictionary[surface_cap_stripped] += 1
+
+                            # dwCaps2
+                            if SURFACE_CAPS2_SKIP_IDENTIFIER not in trace_line:
+                                surface_caps2_start = trace_line.find(SURFACE_CAPS2_IDENTIFIER)
+
+                                # IDirectDraw::CreateSurface and IDirectDraw2::CreateSurface calls
+                                # won't have a dwCaps2 field at all in ddsCaps, only dwCaps
+                                if surface_caps2_start != -1:
+                                    surface_caps2_start += SURFACE_CAPS2_IDENTIFIER_LENGTH
+                                    surface_caps2 = trace_line[surface_caps2_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                                surface_caps2_start)].strip()
+                                    surface_caps2 = surface_caps2.split(SURFACE_CAPS_SPLIT_DELIMITER)
+
+                                    for surface_cap2 in surface_caps2:
+                                        surface_cap2_stripped = surface_cap2.strip()
+                                        self.surface_cap_dictionary[surface_cap2_stripped] += 1
+
+                            # ddpfPixelFormat
+                            if PIXEL_FORMAT_IDENTIFIER in trace_line and PIXEL_FORMAT_SKIP_IDENTIFIER not in trace_line:
+                                pixel_formats_start = trace_line.rfind(PIXEL_FORMAT_FLAGS_IDENTIFIER) + PIXEL_FORMAT_FLAGS_IDENTIFIER_LENGTH
+                                pixel_formats = trace_line[pixel_formats_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                               pixel_formats_start)].strip()
+                                if pixel_formats != PIXEL_FORMAT_FLAGS_SKIP_VALUE:
+                                    pixel_formats = pixel_formats.split(PIXEL_FORMAT_FLAGS_DELIMITER)
+
+                                    for pixel_format in pixel_formats:
+                                        pixel_format_stripped = pixel_format.strip()
+                                        if not pixel_format_stripped.startswith('0x'):
+                                            self.pixel_format_dictionary[pixel_format_stripped] += 1
+                                        elif pixel_format_stripped not in PIXEL_FORMAT_KNOWN_BOGUS_VALUES:
+                                            logger.warning(f'Detected an unhandled pixel format flag: {pixel_format}')
+
+                                    if PIXEL_FORMAT_FOURCC_FLAG in trace_line:
+                                        pixel_format_fourcc_start = trace_line.find(PIXEL_FORMAT_IDENTIFIER_FOURCC) + PIXEL_FORMAT_IDENTIFIER_FOURCC_LENGTH
+                                        pixel_format_fourcc = trace_line[pixel_format_fourcc_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                                                pixel_format_fourcc_start)].strip()
+                                        # in some rare cases we might get an enumeration ending with a FOURCC
+                                        pixel_format_fourcc = pixel_format_fourcc.replace('}', '')
+
+                                        if pixel_format_fourcc.startswith('0x'):
+                                            if pixel_format_fourcc != PIXEL_FORMAT_FOURCC_SKIP_VALUE_HEX:
+                                                try:
+                                                    pixel_format_fourcc_decoded = int(pixel_format_fourcc, 16).to_bytes(4, 'little').decode('ascii')
+                                                    if pixel_format_fourcc_decoded in DDRAW_FOURCC_FORMATS.values():
+                                                        logger.debug('Found FOURCC on line: %s', trace_line)
+
+                                                        pixel_format_fourcc_decoded = ''.join((PIXEL_FORMAT_PREFIX, pixel_format_fourcc_decoded))
+
+                                                        self.format_dictionary[pixel_format_fourcc_decoded] += 1
+                                                    elif pixel_format_fourcc not in PIXEL_FORMAT_KNOWN_BOGUS_FOURCC_VALUES:
+                                                        logger.warning(f'Detected an unhandled FOURCC: {pixel_format_fourcc}')
+                                                except ValueError:
+                                                    logger.warning(f'Detected an unparsable FOURCC: {pixel_format_fourcc}')
+
+                                        elif pixel_format_fourcc.isdigit():
+                                            if pixel_format_fourcc in DDRAW_FOURCC_FORMATS.keys():
+                                                logger.debug('Found FOURCC on line: %s', trace_line)
+
+                                                pixel_format_fourcc_lookup = DDRAW_FOURCC_FORMATS[pixel_format_fourcc]
+                                                pixel_format_fourcc_decoded = ''.join((PIXEL_FORMAT_PREFIX, pixel_format_fourcc_lookup))
+                                                self.format_dictionary[pixel_format_fourcc_decoded] += 1
+
+                                            elif pixel_format_fourcc != PIXEL_FORMAT_FOURCC_SKIP_VALUE:
+                                                logger.warning(f'Detected an unhandled FOURCC: {pixel_format_fourcc}')
+
+                                        # 0x can be found later in a decoded string, so make sure it's not present
+                                        elif pixel_format_fourcc.find('0x') == -1:
+                                            logger.debug('Found FOURCC on line: %s', trace_line)
+
+                                            pixel_format_fourcc_stripped = pixel_format_fourcc.strip()
+                                            self.format_dictionary[pixel_format_fourcc_stripped] += 1
+
+                                        else:
+                                            logger.warning(f'Detected an unparsable FOURCC: {pixel_format_fourcc}')
 
+                        elif FLIP_FLAGS_CALL in call and FLIP_TO_GDI_CALL not in call:
+                            logger.debug('Found flip flags on line: %s', trace_line)
+
+                            if FLIP_FLAGS_SKIP_IDENTIFIER not in trace_line:
+                                flip_flags_start = trace_line.find(FLIP_FLAGS_IDENTIFIER) + FLIP_FLAGS_IDENTIFIER_LENGTH
+                                flip_flags = trace_line[flip_flags_start:trace_line.find(FLIP_FLAGS_IDENTIFIER_END,
+                                                                                         flip_flags_start)].strip()
+                                flip_flags = flip_flags.split(FLIP_FLAGS_SPLIT_DELIMITER)
+
+                                for flip_flag in flip_flags:
+                                    flip_flag_stripped = flip_flag.strip()
+                                    self.flip_flag_dictionary[flip_flag_stripped] += 1
+
+                        elif LOCK_FLAGS_CALL_DDRAW in call:
+                            logger.debug('Found lock flags on line: %s', trace_line)
+
+                            # IDirectDrawSurface7::Lock actually has two sets of dwFlags, with the latter
+                            # being the one related to the actual locks, and what we are interested in
+                            if LOCK_FLAGS_SKIP_IDENTIFIER_DDRAW not in trace_line:
+                                lock_flags_start = trace_line.rfind(LOCK_FLAGS_IDENTIFIER_DDRAW) + LOCK_FLAGS_IDENTIFIER_DDRAW_LENGTH
+                                lock_flags = trace_line[lock_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                         lock_flags_start)].strip()
+
+                                lock_flags = lock_flags.split(LOCK_FLAGS_SPLIT_DELIMITER_DDRAW)
+
+                                for lock_flag in lock_flags:
+                                    lock_flag_stripped = lock_flag.strip()
+
+                                    # Praetorians sets several bogus lock values (not part of the enum)
+                                    if lock_flag_stripped.startswith(LOCK_FLAGS_VALUE_IDENTIFIER_DDRAW):
+                                        self.lock_flag_dictionary[lock_flag_stripped] += 1
+
+                        if api_d3d5_and_up:
+                            if DEVICE_CREATION_CALL_DDRAW in call:
+                                logger.debug('Found device type flags on line: %s', trace_line)
+
+                                device_type_start = trace_line.find(DEVICE_TYPE_IDENTIFIER_DDRAW) + DEVICE_TYPE_IDENTIFIER_DDRAW_LENGTH
+                                device_type = trace_line[device_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                           device_type_start)].strip()
+
+                                if not device_type.startswith(DEVICE_TYPE_SKIP_IDENTIFIER_DDRAW):
+                                    self.device_type_dictionary[device_type] += 1
+
+                            elif RENDER_STATES_CALL_DDRAW in call:
+                                logger.debug('Found render states on line: %s', trace_line)
+
+                                render_state_start = trace_line.find(RENDER_STATES_IDENTIFIER_DDRAW)
+                                if render_state_start != -1:
+                                    render_state = trace_line[render_state_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                                 render_state_start)].strip()
+
+                                    self.render_state_dictionary[render_state] += 1
+
+                                    if render_state == TEXTURE_MAP_BLEND_MODE_VALUE:
+                                        texture_map_mode_start = trace_line.find(TEXTURE_MAP_BLEND_MODE_IDENTIFIER) + TEXTURE_MAP_BLEND_MODE_IDENTIFIER_LENGTH
+                                        texture_map_mode = trace_line[texture_map_mode_start:trace_line.find(TEXTURE_MAP_BLEND_MODE_END,
+                                                                                                             texture_map_mode_start)].strip()
+
+                                        try:
+                                            # apitrace may not do the conversion, so we'll have to do it ourselves
+                                            texture_map_mode = int(texture_map_mode)
+
+                                            if texture_map_mode == 1:
+                                                texture_map_mode = 'D3DTBLEND_DECAL'
+                                            elif texture_map_mode == 2:
+                                                texture_map_mode = 'D3DTBLEND_MODULATE'
+                                            elif texture_map_mode == 3:
+                                                texture_map_mode = 'D3DTBLEND_DECALALPHA'
+                                            elif texture_map_mode == 4:
+                                                texture_map_mode = 'D3DTBLEND_MODULATEALPHA'
+                                            elif texture_map_mode == 5:
+                                                texture_map_mode = 'D3DTBLEND_DECALMASK'
+                                            elif texture_map_mode == 6:
+                                                texture_map_mode = 'D3DTBLEND_MODULATEMASK'
+                                            elif texture_map_mode == 7:
+                                                texture_map_mode = 'D3DTBLEND_COPY'
+                                            elif texture_map_mode == 8:
+                                                texture_map_mode = 'D3DTBLEND_ADD'
                                             else:
-                                                logger.warning(f'Detected an unparsable FOURCC: {pixel_format_fourcc}')
-
-                            elif FLIP_FLAGS_CALL in call and FLIP_TO_GDI_CALL not in call:
-                                logger.debug(f'Found flip flags on line: {trace_line}')
-
-                                if FLIP_FLAGS_SKIP_IDENTIFIER not in trace_line:
-                                    flip_flags_start = trace_line.find(FLIP_FLAGS_IDENTIFIER) + FLIP_FLAGS_IDENTIFIER_LENGTH
-                                    flip_flags = trace_line[flip_flags_start:trace_line.find(FLIP_FLAGS_IDENTIFIER_END,
-                                                                                             flip_flags_start)].strip()
-                                    flip_flags = flip_flags.split(FLIP_FLAGS_SPLIT_DELIMITER)
-
-                                    for flip_flag in flip_flags:
-                                        flip_flag_stripped = flip_flag.strip()
-                                        existing_value = self.flip_flag_dictionary.get(flip_flag_stripped, 0)
-                                        self.flip_flag_dictionary[flip_flag_stripped] = existing_value + 1
-
-                            elif LOCK_FLAGS_CALL_DDRAW in call:
-                                logger.debug(f'Found lock flags on line: {trace_line}')
-
-                                # IDirectDrawSurface7::Lock actually has two sets of dwFlags, with the latter
-                                # being the one related to the actual locks, and what we are interested in
-                                if LOCK_FLAGS_SKIP_IDENTIFIER_DDRAW not in trace_line:
-                                    lock_flags_start = trace_line.rfind(LOCK_FLAGS_IDENTIFIER_DDRAW) + LOCK_FLAGS_IDENTIFIER_DDRAW_LENGTH
-                                    lock_flags = trace_line[lock_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                             lock_flags_start)].strip()
-
-                                    lock_flags = lock_flags.split(LOCK_FLAGS_SPLIT_DELIMITER_DDRAW)
-
-                                    for lock_flag in lock_flags:
-                                        lock_flag_stripped = lock_flag.strip()
-
-                                        # Praetorians sets several bogus lock values (not part of the enum)
-                                        if lock_flag_stripped.startswith(LOCK_FLAGS_VALUE_IDENTIFIER_DDRAW):
-                                            existing_value = self.lock_flag_dictionary.get(lock_flag_stripped, 0)
-                                            self.lock_flag_dictionary[lock_flag_stripped] = existing_value + 1
-
-                            if self.api =='D3D7' or self.api == 'D3D6' or self.api == 'D3D5':
-                                if DEVICE_CREATION_CALL_DDRAW in call:
-                                    logger.debug(f'Found device type flags on line: {trace_line}')
-
-                                    device_type_start = trace_line.find(DEVICE_TYPE_IDENTIFIER_DDRAW) + DEVICE_TYPE_IDENTIFIER_DDRAW_LENGTH
-                                    device_type = trace_line[device_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                               device_type_start)].strip()
-
-                                    if not device_type.startswith(DEVICE_TYPE_SKIP_IDENTIFIER_DDRAW):
-                                        existing_value = self.device_type_dictionary.get(device_type, 0)
-                                        self.device_type_dictionary[device_type] = existing_value + 1
-
-                                elif RENDER_STATES_CALL_DDRAW in call:
-                                    logger.debug(f'Found render states on line: {trace_line}')
-
-                                    render_state_start = trace_line.find(RENDER_STATES_IDENTIFIER_DDRAW)
-                                    if render_state_start != -1:
-                                        render_state = trace_line[render_state_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                     render_state_start)].strip()
-
-                                        existing_value = self.render_state_dictionary.get(render_state, 0)
-                                        self.render_state_dictionary[render_state] = existing_value + 1
-
-                                        if render_state == TEXTURE_MAP_BLEND_MODE_VALUE:
-                                            texture_map_mode_start = trace_line.find(TEXTURE_MAP_BLEND_MODE_IDENTIFIER) + TEXTURE_MAP_BLEND_MODE_IDENTIFIER_LENGTH
-                                            texture_map_mode = trace_line[texture_map_mode_start:trace_line.find(TEXTURE_MAP_BLEND_MODE_END,
-                                                                                                                 texture_map_mode_start)].strip()
-
-                                            try:
-                                                # apitrace may not do the conversion, so we'll have to do it ourselves
-                                                texture_map_mode = int(texture_map_mode)
-
-                                                if texture_map_mode == 1:
-                                                    texture_map_mode = 'D3DTBLEND_DECAL'
-                                                elif texture_map_mode == 2:
-                                                    texture_map_mode = 'D3DTBLEND_MODULATE'
-                                                elif texture_map_mode == 3:
-                                                    texture_map_mode = 'D3DTBLEND_DECALALPHA'
-                                                elif texture_map_mode == 4:
-                                                    texture_map_mode = 'D3DTBLEND_MODULATEALPHA'
-                                                elif texture_map_mode == 5:
-                                                    texture_map_mode = 'D3DTBLEND_DECALMASK'
-                                                elif texture_map_mode == 6:
-                                                    texture_map_mode = 'D3DTBLEND_MODULATEMASK'
-                                                elif texture_map_mode == 7:
-                                                    texture_map_mode = 'D3DTBLEND_COPY'
-                                                elif texture_map_mode == 8:
-                                                    texture_map_mode = 'D3DTBLEND_ADD'
-                                                else:
-                                                    texture_map_mode = None
+                                                texture_map_mode = None
+
+                                        except ValueError:
+                                            pass
 
-                                            except ValueError:
-                                                pass
+                                        # work around an older apitrace bug which decoded values to D3DBLEND_
+                                        if texture_map_mode is not None and not texture_map_mode.startswith('D3DBLEND_'):
+                                            self.texture_map_mode_dictionary[texture_map_mode] += 1
+
+                            elif DRAW_FLAGS_CALL in call:
+                                logger.debug('Found draw flags on line: %s', trace_line)
+
+                                if DRAW_FLAGS_SKIP_IDENTIFIER not in trace_line:
+                                    draw_flags_start = trace_line.find(DRAW_FLAGS_IDENTIFIER) + DRAW_FLAGS_IDENTIFIER_LENGTH
+                                    draw_flags = trace_line[draw_flags_start:trace_line.find(DRAW_FLAGS_IDENTIFIER_END,
+                                                                                                draw_flags_start)].strip()
+
+                                    draw_flags_actual = []
+                                    try:
+                                        # apitrace may not do the conversion, so we'll have to do it ourselves
+                                        draw_flags = int(draw_flags)
+
+                                        if draw_flags & D3DDP_WAIT:
+                                            draw_flags_actual.append('D3DDP_WAIT')
+                                        if draw_flags & D3DDP_OUTOFORDER:
+                                            draw_flags_actual.append('D3DDP_OUTOFORDER')
+                                        if draw_flags & D3DDP_DONOTCLIP:
+                                            draw_flags_actual.append('D3DDP_DONOTCLIP')
+                                        if draw_flags & D3DDP_DONOTUPDATEEXTENTS:
+                                            draw_flags_actual.append('D3DDP_DONOTUPDATEEXTENTS')
+                                        if draw_flags & D3DDP_DONOTLIGHT:
+                                            draw_flags_actual.append('D3DDP_DONOTLIGHT')
+
+                                    except ValueError:
+                                        draw_flags_actual = draw_flags.split(DRAW_FLAGS_SPLIT_DELIMITER)
+
+                                    for draw_flag in draw_flags_actual:
+                                        draw_flag_stripped = draw_flag.strip()
+                                        self.draw_flag_dictionary[draw_flag_stripped] += 1
+
+                            if api_d3d6_and_up:
+                                if PROCESS_VERTICES_FLAGS_CALL in call:
+                                    logger.debug('Found process vertices flags on line: %s', trace_line)
+
+                                    if PROCESS_VERTICES_FLAGS_SKIP_IDENTIFIER not in trace_line:
+                                        process_vertices_flags_start = trace_line.find(PROCESS_VERTICES_FLAGS_IDENTIFIER) + PROCESS_VERTICES_FLAGS_IDENTIFIER_LENGTH
+                                        process_vertices_flags = trace_line[process_vertices_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                                                        process_vertices_flags_start)].strip()
+
+                                        process_vertices_flags_actual = []
+                                        try:
+                                            # apitrace may not do the conversion, so we'll have to do it ourselves
+                                            process_vertices_flags = int(process_vertices_flags)
+
+                                            if process_vertices_flags & D3DVOP_TRANSFORM:
+                                                process_vertices_flags_actual.append('D3DVOP_TRANSFORM')
+                                            if process_vertices_flags & D3DVOP_CLIP:
+                                                process_vertices_flags_actual.append('D3DVOP_CLIP')
+                                            if process_vertices_flags & D3DVOP_EXTENTS:
+                                                process_vertices_flags_actual.append('D3DVOP_EXTENTS')
+                                            if process_vertices_flags & D3DVOP_LIGHT:
+                                                process_vertices_flags_actual.append('D3DVOP_LIGHT')
 
-                                            # work around an older apitrace bug which decoded values to D3DBLEND_
-                                            if texture_map_mode is not None and not texture_map_mode.startswith('D3DBLEND_'):
-                                                existing_value = self.texture_map_mode_dictionary.get(texture_map_mode, 0)
-                                                self.texture_map_mode_dictionary[texture_map_mode] = existing_value + 1
+                                        except ValueError:
+                                            process_vertices_flags_actual = process_vertices_flags.split(PROCESS_VERTICES_FLAGS_SPLIT_DELIMITER)
+
+                                        for process_vertices_flag in process_vertices_flags_actual:
+                                            process_vertices_flag_stripped = process_vertices_flag.strip()
+                                            self.process_vertices_flag_dictionary[process_vertices_flag_stripped] += 1
 
-                                elif DRAW_FLAGS_CALL in call:
-                                    logger.debug(f'Found draw flags on line: {trace_line}')
+                                elif VERTEX_BUFFER_CAPS_CALL in call:
+                                    logger.debug('Found vertex buffer caps on line: %s', trace_line)
 
-                                    if DRAW_FLAGS_SKIP_IDENTIFIER not in trace_line:
-                                        draw_flags_start = trace_line.find(DRAW_FLAGS_IDENTIFIER) + DRAW_FLAGS_IDENTIFIER_LENGTH
-                                        draw_flags = trace_line[draw_flags_start:trace_line.find(DRAW_FLAGS_IDENTIFIER_END,
-                                                                                                    draw_flags_start)].strip()
+                                    if VERTEX_BUFFER_CAPS_SKIP_IDENTIFIER not in trace_line:
+                                        vertex_buffer_caps_start = trace_line.find(VERTEX_BUFFER_CAPS_IDENTIFIER) + VERTEX_BUFFER_CAPS_IDENTIFIER_LENGTH
+                                        vertex_buffer_caps = trace_line[vertex_buffer_caps_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                                                vertex_buffer_caps_start)].strip()
 
-                                        draw_flags_actual = []
+                                        vertex_buffer_caps_actual = []
                                         try:
                                             # apitrace may not do the conversion, so we'll have to do it ourselves
-                                            draw_flags = int(draw_flags)
-
-                                            if draw_flags & D3DDP_WAIT:
-                                                draw_flags_actual.append('D3DDP_WAIT')
-                                            if draw_flags & D3DDP_OUTOFORDER:
-                                                draw_flags_actual.append('D3DDP_OUTOFORDER')
-                                            if draw_flags & D3DDP_DONOTCLIP:
-                                                draw_flags_actual.append('D3DDP_DONOTCLIP')
-                                            if draw_flags & D3DDP_DONOTUPDATEEXTENTS:
-                                                draw_flags_actual.append('D3DDP_DONOTUPDATEEXTENTS')
-                                            if draw_flags & D3DDP_DONOTLIGHT:
-                                                draw_flags_actual.append('D3DDP_DONOTLIGHT')
+                                            vertex_buffer_caps = int(vertex_buffer_caps)
+
+                                            if vertex_buffer_caps & D3DVBCAPS_SYSTEMMEMORY:
+                                                vertex_buffer_caps_actual.append('D3DVBCAPS_SYSTEMMEMORY')
+                                            if vertex_buffer_caps & D3DVBCAPS_WRITEONLY:
+                                                vertex_buffer_caps_actual.append('D3DVBCAPS_WRITEONLY')
+                                            if vertex_buffer_caps & D3DVBCAPS_OPTIMIZED:
+                                                vertex_buffer_caps_actual.append('D3DVBCAPS_OPTIMIZED')
+                                            if vertex_buffer_caps & D3DVBCAPS_DONOTCLIP:
+                                                vertex_buffer_caps_actual.append('D3DVBCAPS_DONOTCLIP')
 
                                         except ValueError:
-                                            draw_flags_actual = draw_flags.split(DRAW_FLAGS_SPLIT_DELIMITER)
-
-                                        for draw_flag in draw_flags_actual:
-                                            draw_flag_stripped = draw_flag.strip()
-                                            existing_value = self.draw_flag_dictionary.get(draw_flag_stripped, 0)
-                                            self.draw_flag_dictionary[draw_flag_stripped] = existing_value + 1
-
-                                if self.api =='D3D7' or self.api == 'D3D6':
-                                    if PROCESS_VERTICES_FLAGS_CALL in call:
-                                        logger.debug(f'Found process vertices flags on line: {trace_line}')
-
-                                        if PROCESS_VERTICES_FLAGS_SKIP_IDENTIFIER not in trace_line:
-                                            process_vertices_flags_start = trace_line.find(PROCESS_VERTICES_FLAGS_IDENTIFIER) + PROCESS_VERTICES_FLAGS_IDENTIFIER_LENGTH
-                                            process_vertices_flags = trace_line[process_vertices_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                                            process_vertices_flags_start)].strip()
-
-                                            process_vertices_flags_actual = []
-                                            try:
-                                                # apitrace may not do the conversion, so we'll have to do it ourselves
-                                                process_vertices_flags = int(process_vertices_flags)
-
-                                                if process_vertices_flags & D3DVOP_TRANSFORM:
-                                                    process_vertices_flags_actual.append('D3DVOP_TRANSFORM')
-                                                if process_vertices_flags & D3DVOP_CLIP:
-                                                    process_vertices_flags_actual.append('D3DVOP_CLIP')
-                                                if process_vertices_flags & D3DVOP_EXTENTS:
-                                                    process_vertices_flags_actual.append('D3DVOP_EXTENTS')
-                                                if process_vertices_flags & D3DVOP_LIGHT:
-                                                    process_vertices_flags_actual.append('D3DVOP_LIGHT')
-
-                                            except ValueError:
-                                                process_vertices_flags_actual = process_vertices_flags.split(PROCESS_VERTICES_FLAGS_SPLIT_DELIMITER)
-
-                                            for process_vertices_flag in process_vertices_flags_actual:
-                                                process_vertices_flag_stripped = process_vertices_flag.strip()
-                                                existing_value = self.process_vertices_flag_dictionary.get(process_vertices_flag_stripped, 0)
-                                                self.process_vertices_flag_dictionary[process_vertices_flag_stripped] = existing_value + 1
-
-                                    elif VERTEX_BUFFER_CAPS_CALL in call:
-                                        logger.debug(f'Found vertex buffer caps on line: {trace_line}')
-
-                                        if VERTEX_BUFFER_CAPS_SKIP_IDENTIFIER not in trace_line:
-                                            vertex_buffer_caps_start = trace_line.find(VERTEX_BUFFER_CAPS_IDENTIFIER) + VERTEX_BUFFER_CAPS_IDENTIFIER_LENGTH
-                                            vertex_buffer_caps = trace_line[vertex_buffer_caps_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                                    vertex_buffer_caps_start)].strip()
-
-                                            vertex_buffer_caps_actual = []
-                                            try:
-                                                # apitrace may not do the conversion, so we'll have to do it ourselves
-                                                vertex_buffer_caps = int(vertex_buffer_caps)
-
-                                                if vertex_buffer_caps & D3DVBCAPS_SYSTEMMEMORY:
-                                                    vertex_buffer_caps_actual.append('D3DVBCAPS_SYSTEMMEMORY')
-                                                if vertex_buffer_caps & D3DVBCAPS_WRITEONLY:
-                                                    vertex_buffer_caps_actual.append('D3DVBCAPS_WRITEONLY')
-                                                if vertex_buffer_caps & D3DVBCAPS_OPTIMIZED:
-                                                    vertex_buffer_caps_actual.append('D3DVBCAPS_OPTIMIZED')
-                                                if vertex_buffer_caps & D3DVBCAPS_DONOTCLIP:
-                                                    vertex_buffer_caps_actual.append('D3DVBCAPS_DONOTCLIP')
-
-                                            except ValueError:
-                                                vertex_buffer_caps_actual = vertex_buffer_caps.split(VERTEX_BUFFER_CAPS_SPLIT_DELIMITER)
-
-                                            for vertex_buffer_cap in vertex_buffer_caps_actual:
-                                                vertex_buffer_cap_stripped = vertex_buffer_cap.strip()
-                                                existing_value = self.vertex_buffer_cap_dictionary.get(vertex_buffer_cap_stripped, 0)
-                                                self.vertex_buffer_cap_dictionary[vertex_buffer_cap_stripped] = existing_value + 1
-
-                        elif self.api == 'D3D8' or self.api == 'D3D9Ex' or self.api == 'D3D9':
-                            if CHECK_DEVICE_FORMAT_CALL in call:
-                                check_device_format_start = trace_line.find(CHECK_DEVICE_FORMAT_IDENTIFIER) + CHECK_DEVICE_FORMAT_IDENTIFIER_LENGTH
-                                check_device_format_value = trace_line[check_device_format_start:trace_line.find(CHECK_DEVICE_FORMAT_IDENTIFIER_END,
-                                                                                                                 check_device_format_start)].strip()
-
-                                # decoded D3DFORMAT values (for regular CheckDeviceFormat queries) should be skipped
-                                if check_device_format_value.isdigit():
-                                    logger.debug(f'CheckDeviceFormat call with numeric format value: {check_device_format_value}')
-
-                                    check_device_format_value_int = int(check_device_format_value)
-
-                                    if check_device_format_value in VENDOR_HACK_VALUES.keys():
-                                        logger.debug(f'Found vendor hack check on line: {trace_line}')
-                                        vendor_hack_format_value_lookup = VENDOR_HACK_VALUES[check_device_format_value]
-                                        vendor_hack_format_value_decoded = ''.join((CHECK_DEVICE_FORMAT_IDENTIFIER, vendor_hack_format_value_lookup))
-
-                                        existing_value = self.vendor_hack_check_dictionary.get(vendor_hack_format_value_decoded, 0)
-                                        self.vendor_hack_check_dictionary[vendor_hack_format_value_decoded] = existing_value + 1
-                                    elif check_device_format_value_int > 0:
-                                        potential_vendor_hack_format_value = self.detect_potential_vendor_hack(check_device_format_value_int, trace_line)
-
-                                        if potential_vendor_hack_format_value is not None and potential_vendor_hack_format_value not in KNOWN_FOURCC_FORMATS:
-                                            logger.warning(f'Detected a check for a FOURCC/potential vendor hack value: {potential_vendor_hack_format_value}')
-
-                            elif DEVICE_CREATION_CALL in call:
-                                logger.debug(f'Found device type, behavior flags and present parameters on line: {trace_line}')
-
-                                device_type_start = trace_line.find(DEVICE_TYPE_IDENTIFIER) + DEVICE_TYPE_IDENTIFIER_LENGTH
-                                device_type = trace_line[device_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                           device_type_start)].strip()
+                                            vertex_buffer_caps_actual = vertex_buffer_caps.split(VERTEX_BUFFER_CAPS_SPLIT_DELIMITER)
 
-                                existing_value = self.device_type_dictionary.get(device_type, 0)
-                                self.device_type_dictionary[device_type] = existing_value + 1
-
-                                behavior_flags_start = trace_line.find(BEHAVIOR_FLAGS_IDENTIFIER) + BEHAVIOR_FLAGS_IDENTIFIER_LENGTH
-                                behavior_flags = trace_line[behavior_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                 behavior_flags_start)].strip()
-                                behavior_flags = behavior_flags.split(BEHAVIOR_FLAGS_SPLIT_DELIMITER)
-
-                                for behavior_flag in behavior_flags:
-                                    behavior_flag_stripped = behavior_flag.strip()
-                                    existing_value = self.behavior_flag_dictionary.get(behavior_flag_stripped, 0)
-                                    self.behavior_flag_dictionary[behavior_flag_stripped] = existing_value + 1
-
-                                if PRESENT_PARAMETERS_SKIP_IDENTIFIER not in trace_line:
-                                    if PRESENT_PARAMETER_FLAGS_SKIP_IDENTIFIER not in trace_line:
-                                        present_parameter_flags_start = trace_line.find(PRESENT_PARAMETER_FLAGS_IDENTIFIER) + PRESENT_PARAMETER_FLAGS_IDENTIFIER_LENGTH
-                                        present_parameter_flags = trace_line[present_parameter_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                                           present_parameter_flags_start)].strip()
-                                        present_parameter_flags = present_parameter_flags.split(PRESENT_PARAMETER_FLAGS_SPLIT_DELIMITER)
-
-                                        for present_parameter_flag in present_parameter_flags:
-                                            present_parameter_flag_stripped = present_parameter_flag.strip()
-                                            existing_value = self.present_parameter_flag_dictionary.get(present_parameter_flag_stripped, 0)
-                                            self.present_parameter_flag_dictionary[present_parameter_flag_stripped] = existing_value + 1
-
-                                    present_parameters_start = trace_line.find(PRESENT_PARAMETERS_IDENTIFIER) + PRESENT_PARAMETERS_IDENTIFIER_LENGTH
-                                    present_parameters = trace_line[present_parameters_start:trace_line.find(PRESENT_PARAMETERS_IDENTIFIER_END,
-                                                                                                             present_parameters_start)].strip()
-                                    present_parameters = present_parameters.split(PRESENT_PARAMETERS_SPLIT_DELIMITER)
-
-                                    for present_parameter in present_parameters:
-                                        present_parameter_stripped = present_parameter.strip()
-                                        present_parameter_key, present_parameter_value = present_parameter_stripped.split(PRESENT_PARAMETERS_VALUE_SPLIT_DELIMITER)
-
-                                        if present_parameter_key not in PRESENT_PARAMETERS_SKIPPED:
-                                            existing_value = self.present_parameter_dictionary.get(present_parameter_stripped, 0)
-                                            self.present_parameter_dictionary[present_parameter_stripped] = existing_value + 1
-
-                            elif RENDER_STATES_CALL in call:
-                                logger.debug(f'Found render states on line: {trace_line}')
-
-                                render_state_start = trace_line.find(RENDER_STATES_IDENTIFIER) + RENDER_STATES_IDENTIFIER_LENGTH
-                                render_state = trace_line[render_state_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                             render_state_start)].strip()
-
-                                if render_state not in RENDER_STATES_SKIPPED:
-                                    existing_value = self.render_state_dictionary.get(render_state, 0)
-                                    self.render_state_dictionary[render_state] = existing_value + 1
-
-                                render_state_point_size = VENDOR_HACK_POINTSIZE in trace_line
-                                render_state_adaptivetess_x = VENDOR_HACK_ADAPTIVETESS_X in trace_line
-                                render_state_adaptivetess_y = VENDOR_HACK_ADAPTIVETESS_Y in trace_line
-
-                                if render_state_point_size or render_state_adaptivetess_x or render_state_adaptivetess_y:
-                                    vendor_hack_start = trace_line.find(VENDOR_HACK_IDENTIFIER) + VENDOR_HACK_IDENTIFIER_LENGTH
-                                    vendor_hack_value = trace_line[vendor_hack_start:trace_line.find(VENDOR_HACK_IDENTIFIER_END,
-                                                                                                     vendor_hack_start)].strip()
-
-                                    if render_state_point_size:
-                                        vendor_hack_render_state = 'D3DRS_POINTSIZE = '
-                                    elif render_state_adaptivetess_x:
-                                        vendor_hack_render_state = 'D3DRS_ADAPTIVETESS_X = '
-                                    elif render_state_adaptivetess_y:
-                                        vendor_hack_render_state = 'D3DRS_ADAPTIVETESS_Y = '
-
-                                    vendor_hack_value_int = int(vendor_hack_value)
-
-                                    if vendor_hack_value in VENDOR_HACK_VALUES.keys():
-                                        logger.debug(f'Found vendor hack on line: {trace_line}')
-
-                                        vendor_hack_value_lookup = VENDOR_HACK_VALUES[vendor_hack_value]
-                                        vendor_hack_value_decoded = ''.join((vendor_hack_render_state, vendor_hack_value_lookup))
-                                        existing_value = self.vendor_hack_dictionary.get(vendor_hack_value_decoded, 0)
-                                        self.vendor_hack_dictionary[vendor_hack_value_decoded] = existing_value + 1
-                                    elif vendor_hack_value_int > 0:
-                                        potential_vendor_hack_value = self.detect_potential_vendor_hack(vendor_hack_value_int, trace_line)
-
-                                        if potential_vendor_hack_value is not None:
-                                            logger.warning(f'Detected a potential vendor hack value: {potential_vendor_hack_value}')
-
-                            # D3D8 uses IDirect3DDevice8::GetInfo calls to initiate queries
-                            elif self.api == 'D3D8' and QUERY_TYPE_CALL_D3D8 in call:
-                                logger.debug(f'Found query type on line: {trace_line}')
-
-                                query_type_start = trace_line.find(QUERY_TYPE_IDENTIFIER_D3D8) + QUERY_TYPE_IDENTIFIER_LENGTH_D3D8
-                                query_type = trace_line[query_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                         query_type_start)].strip()
-                                query_type_decoded = self.d3d8_query_type(query_type)
-                                logger.debug(f'Decoded query type is: {query_type_decoded}')
-
-                                existing_value = self.query_type_dictionary.get(query_type_decoded, 0)
-                                self.query_type_dictionary[query_type_decoded] = existing_value + 1
-
-                            # D3D9Ex/D3D9 use IDirect3DQuery9::CreateQuery to initiate queries
-                            elif (self.api == 'D3D9Ex' or self.api == 'D3D9') and QUERY_TYPE_CALL_D3D9_10_11 in call:
-                                logger.debug(f'Found query type on line: {trace_line}')
-
-                                query_type_start = trace_line.find(QUERY_TYPE_IDENTIFIER_D3D9) + QUERY_TYPE_IDENTIFIER_LENGTH_D3D9
-                                query_type = trace_line[query_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                         query_type_start)].strip()
-
-                                existing_value = self.query_type_dictionary.get(query_type, 0)
-                                self.query_type_dictionary[query_type] = existing_value + 1
-
-                            elif LOCK_FLAGS_CALL in call:
-                                logger.debug(f'Found lock flags on line: {trace_line}')
-
-                                if LOCK_FLAGS_SKIP_IDENTIFIER not in trace_line:
-                                    lock_flags_start = trace_line.find(LOCK_FLAGS_IDENTIFIER) + LOCK_FLAGS_IDENTIFIER_LENGTH
-                                    lock_flags = trace_line[lock_flags_start:trace_line.find(LOCK_FLAGS_IDENTIFIER_END,
-                                                                                            lock_flags_start)].strip()
-
-                                    lock_flags = lock_flags.split(LOCK_FLAGS_SPLIT_DELIMITER)
-
-                                    for lock_flag in lock_flags:
-                                        lock_flag_stripped = lock_flag.strip()
-
-                                        # Mafia sets several bogus lock values (not part of the enum)
-                                        if lock_flag_stripped.startswith(LOCK_FLAGS_VALUE_IDENTIFIER):
-                                            existing_value = self.lock_flag_dictionary.get(lock_flag_stripped, 0)
-                                            self.lock_flag_dictionary[lock_flag_stripped] = existing_value + 1
-
-                            # shader version identifiers can either be part of CreateVertexShader/CreatePixelShader
-                            # calls, or included as part of an additional line below those calls in apitrace dumps
-                            elif VERTEX_SHADER_CALL in call or PIXEL_SHADER_CALL in call or shader_line:
-                                logger.debug(f'Found shader on line: {trace_line}')
-
-                                # not having a shader line means it's a shader creation call
-                                if not shader_line:
-                                    if self.shader_dump and trace_call_counter > 0 and SHADER_DUMP_SKIP_IDENTIFIER_D3D8_9 not in trace_line:
-                                        self.shader_dump_call_array.append(str(trace_call_counter))
-
-                                    # shader dissasebly can fail, in which case apitrace will dump bytecode blobs
-                                    if not SHADER_NO_DISASSEMBLY_D3D8_9 in trace_line:
-                                        if not shader_call_context:
-                                            shader_call_context = True
-                                        else:
-                                            logger.warning('Shader call context already detected')
-                                    else:
-                                        logger.warning('Unable to parse shader version due to bytecode dump')
+                                        for vertex_buffer_cap in vertex_buffer_caps_actual:
+                                            vertex_buffer_cap_stripped = vertex_buffer_cap.strip()
+                                            self.vertex_buffer_cap_dictionary[vertex_buffer_cap_stripped] += 1
 
-                                # don't do any parsing unless a shader creation call has been detected
-                                if shader_call_context:
-                                    # strip any comments from a shader line
-                                    if shader_line:
-                                        trace_line = trace_line.split('//')[0].rstrip()
+                    elif api_d3d8_d3d9:
+                        if CHECK_DEVICE_FORMAT_CALL in call:
+                            check_device_format_start = trace_line.find(CHECK_DEVICE_FORMAT_IDENTIFIER) + CHECK_DEVICE_FORMAT_IDENTIFIER_LENGTH
+                            check_device_format_value = trace_line[check_device_format_start:trace_line.find(CHECK_DEVICE_FORMAT_IDENTIFIER_END,
+                                                                                                             check_device_format_start)].strip()
 
-                                    # D3D8 handles FVF thourgh CreateVertexShader, and there is no way to
-                                    # track these otherwise, so treat them as 'vs_fvf' shader versions instead
-                                    if self.api == 'D3D8' and VERTEX_SHADER_CALL in call and 'pFunction = NULL' in trace_line:
-                                        shader_version = 'vs_fvf'
-                                        logger.debug(f'Shader version: {shader_version}')
+                            # decoded D3DFORMAT values (for regular CheckDeviceFormat queries) should be skipped
+                            if check_device_format_value.isdigit():
+                                logger.debug('CheckDeviceFormat call with numeric format value: %s', check_device_format_value)
 
-                                        existing_value = self.shader_version_dictionary.get(shader_version, 0)
-                                        self.shader_version_dictionary[shader_version] = existing_value + 1
+                                check_device_format_value_int = int(check_device_format_value)
 
-                                        shader_call_context = False
+                                if check_device_format_value in VENDOR_HACK_VALUES.keys():
+                                    logger.debug('Found vendor hack check on line: %s', trace_line)
+                                    vendor_hack_format_value_lookup = VENDOR_HACK_VALUES[check_device_format_value]
+                                    vendor_hack_format_value_decoded = ''.join((CHECK_DEVICE_FORMAT_IDENTIFIER, vendor_hack_format_value_lookup))
 
-                                    else:
-                                        shader_version = None
-
-                                        shader_version_start_vertex = trace_line.find(VERTEX_SHADER_IDENTIFIER)
-                                        shader_version_start_pixel = trace_line.find(PIXEL_SHADER_IDENTIFIER)
-
-                                        if shader_version_start_vertex != -1:
-                                            shader_version = trace_line[shader_version_start_vertex:shader_version_start_vertex +
-                                                                                                    VERTEX_SHADER_IDENTIFIER_LENGTH +
-                                                                                                    SHADER_VERSION_OFFSET]
-                                        elif shader_version_start_pixel != -1:
-                                            shader_version = trace_line[shader_version_start_pixel:shader_version_start_pixel +
-                                                                                                PIXEL_SHADER_IDENTIFIER_LENGTH +
-                                                                                                SHADER_VERSION_OFFSET]
+                                    self.vendor_hack_check_dictionary[vendor_hack_format_value_decoded] += 1
+                                elif check_device_format_value_int > 0:
+                                    potential_vendor_hack_format_value = self.detect_potential_vendor_hack(check_device_format_value_int, trace_line)
 
-                                        # count '_' occurances to filter out some potentially dubious string matches
-                                        if shader_version is not None and shader_version.count('_') == 2:
-                                            logger.debug(f'Shader version: {shader_version}')
+                                    if potential_vendor_hack_format_value is not None and potential_vendor_hack_format_value not in KNOWN_FOURCC_FORMATS:
+                                        logger.warning(f'Detected a check for a FOURCC/potential vendor hack value: {potential_vendor_hack_format_value}')
 
-                                            existing_value = self.shader_version_dictionary.get(shader_version, 0)
-                                            self.shader_version_dictionary[shader_version] = existing_value + 1
+                        elif DEVICE_CREATION_CALL in call:
+                            logger.debug('Found device type, behavior flags and present parameters on line: %s', trace_line)
 
-                                            shader_call_context = False
-                                else:
-                                    logger.debug(f'Skipped parsing of shader line: {trace_line}')
-
-                            elif API_ENTRY_FORMAT_BASE_CALL in call:
-                                if FORMAT_IDENTIFIER in trace_line:
-                                    logger.debug(f'Found format on line: {trace_line}')
-
-                                    format_start = trace_line.find(FORMAT_IDENTIFIER) + FORMAT_IDENTIFIER_LENGTH
-                                    format_value = trace_line[format_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                           format_start)].strip()
-
-                                    existing_value = self.format_dictionary.get(format_value, 0)
-                                    self.format_dictionary[format_value] = existing_value + 1
-
-                                if USAGE_IDENTIFIER in trace_line:
-                                    logger.debug(f'Found usage on line: {trace_line}')
-
-                                    if USAGE_SKIP_IDENTIFIER not in trace_line:
-                                        usage_start = trace_line.find(USAGE_IDENTIFIER) + USAGE_IDENTIFIER_LENGTH
-                                        # Usually, usage values will end on a comma
-                                        usage_end = trace_line.find(API_ENTRY_VALUE_DELIMITER, usage_start)
-                                        # In D3D8, usage values are also included in CreateVertexShader
-                                        # calls, where they sit at the end of the parameter list
-                                        if usage_end == -1:
-                                            usage_end = trace_line.find(USAGE_IDENTIFIER_END_D3D8, usage_start)
-                                        usage_values = trace_line[usage_start:usage_end].strip()
-                                        usage_values = usage_values.split(USAGE_SPLIT_DELIMITER)
-
-                                        for usage_value in usage_values:
-                                            usage_value_stripped = usage_value.strip()
-                                            if usage_value_stripped.startswith(USAGE_VALUE_IDENTIFIER):
-                                                existing_value = self.usage_dictionary.get(usage_value_stripped, 0)
-                                                self.usage_dictionary[usage_value_stripped] = existing_value + 1
-
-                                if POOL_IDENTIFIER in trace_line:
-                                    logger.debug(f'Found pool on line: {trace_line}')
-
-                                    pool_start = trace_line.find(POOL_IDENTIFIER) + POOL_IDENTIFIER_LENGTH
-                                    pool_value = trace_line[pool_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                       pool_start)].strip()
-
-                                    existing_value = self.pool_dictionary.get(pool_value, 0)
-                                    self.pool_dictionary[pool_value] = existing_value + 1
-
-                        elif self.api == 'D3D10' or self.api == 'D3D11':
-                            if DEVICE_FLAGS_AND_FEATURE_LEVELS_CALL in call:
-                                logger.debug(f'Found device flags and feature levels on line: {trace_line}')
-
-                                if DEVICE_FLAGS_SKIP_IDENTIFIER not in trace_line:
-                                    device_flags_start = trace_line.find(DEVICE_FLAGS_IDENTIFIER) + DEVICE_FLAGS_IDENTIFIER_LENGTH
-                                    device_flags = trace_line[device_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                 device_flags_start)].strip()
-                                    device_flags = device_flags.split(DEVICE_FLAGS_SPLIT_DELIMITER)
-
-                                    for device_flag in device_flags:
-                                        device_flag_stripped = device_flag.strip()
-                                        existing_value = self.device_flag_dictionary.get(device_flag_stripped, 0)
-                                        self.device_flag_dictionary[device_flag_stripped] = existing_value + 1
-
-                                if FEATURE_LEVELS_SKIP_IDENTIFIER not in trace_line:
-                                    if FEATURE_LEVELS_IDENTIFIER in trace_line:
-                                        feature_levels_start = trace_line.find(FEATURE_LEVELS_IDENTIFIER) + FEATURE_LEVELS_IDENTIFIER_LENGTH
-                                        feature_levels = trace_line[feature_levels_start:trace_line.find(FEATURE_LEVELS_IDENTIFIER_END,
-                                                                                                         feature_levels_start)].strip()
-                                        feature_levels = feature_levels.split(API_ENTRY_VALUE_DELIMITER)
-
-                                        for feature_level in feature_levels:
-                                            feature_level_stripped = feature_level.strip()
-                                            existing_value = self.feature_level_dictionary.get(feature_level_stripped, 0)
-                                            self.feature_level_dictionary[feature_level_stripped] = existing_value + 1
-
-                                    elif FEATURE_LEVELS_IDENTIFIER_ONE in trace_line:
-                                        feature_levels_start = trace_line.find(FEATURE_LEVELS_IDENTIFIER_ONE) + FEATURE_LEVELS_IDENTIFIER_ONE_LENGTH
-                                        feature_level_stripped = trace_line[feature_levels_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                                 feature_levels_start)].strip()
-                                        existing_value = self.feature_level_dictionary.get(feature_level_stripped, 0)
-                                        self.feature_level_dictionary[feature_level_stripped] = existing_value + 1
-
-                            # need to cater for 'CreateDeviceAndSwapChain' parameters parsing too, so no elif
-                            if SWAPCHAIN_PARAMETERS_CALL in call or SWAPCHAIN_DEVICE_PARAMETERS_CALL in call:
-                                logger.debug(f'Found swapchain parameters on line: {trace_line}')
-
-                                if SWAPCHAIN_PARAMETERS_SKIP_IDENTIFIER not in trace_line and SWAPCHAIN_PARAMETERS_SKIP_IDENTIFIER_2 not in trace_line:
-                                    swapchain_parameters_position = trace_line.find(SWAPCHAIN_PARAMETERS_IDENTIFIER)
-                                    swapchain_parameters_variant = SWAPCHAIN_PARAMETERS_IDENTIFIER if swapchain_parameters_position != -1 else SWAPCHAIN_PARAMETERS_IDENTIFIER_2
-                                    swapchain_parameters_length_variant = SWAPCHAIN_PARAMETERS_IDENTIFIER_LENGTH if swapchain_parameters_position != -1 else SWAPCHAIN_PARAMETERS_IDENTIFIER_LENGTH_2
-
-                                    swapchain_parameters_end_position = trace_line.find(SWAPCHAIN_PARAMETERS_IDENTIFIER_END)
-                                    swapchain_parameters_end_variant = SWAPCHAIN_PARAMETERS_IDENTIFIER_END if swapchain_parameters_end_position != -1 else SWAPCHAIN_PARAMETERS_IDENTIFIER_END_2
-
-
-                                    swapchain_parameters_start = trace_line.find(swapchain_parameters_variant) + swapchain_parameters_length_variant
-                                    swapchain_parameters = trace_line[swapchain_parameters_start:trace_line.find(swapchain_parameters_end_variant,
-                                                                                                                 swapchain_parameters_start)].strip()
-                                    # we need to strip the the desc for any array flags and add split delimiters
-                                    swapchain_parameters = swapchain_parameters.replace('{', SWAPCHAIN_PARAMETERS_SPLIT_DELIMITER).replace('}', SWAPCHAIN_PARAMETERS_SPLIT_DELIMITER)
-                                    swapchain_parameters = swapchain_parameters.split(SWAPCHAIN_PARAMETERS_SPLIT_DELIMITER)
-
-                                    for swapchain_parameter in swapchain_parameters:
-                                        swapchain_parameter_stripped = swapchain_parameter.strip()
+                            device_type_start = trace_line.find(DEVICE_TYPE_IDENTIFIER) + DEVICE_TYPE_IDENTIFIER_LENGTH
+                            device_type = trace_line[device_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                       device_type_start)].strip()
 
-                                        try:
-                                            swapchain_parameter_key, swapchain_parameter_value = swapchain_parameter_stripped.split(SWAPCHAIN_PARAMETERS_VALUE_SPLIT_DELIMITER, 1)
+                            self.device_type_dictionary[device_type] += 1
 
-                                            if swapchain_parameter_key in SWAPCHAIN_PARAMETERS_CAPTURED:
-                                                if swapchain_parameter_value != '0x0':
-                                                    if swapchain_parameter_key == 'BufferUsage':
-                                                        swapchain_buffer_usage = swapchain_parameter_value.split(SWAPCHAIN_BUFFER_USAGE_VALUE_SPLIT_DELIMITER)
+                            behavior_flags_start = trace_line.find(BEHAVIOR_FLAGS_IDENTIFIER) + BEHAVIOR_FLAGS_IDENTIFIER_LENGTH
+                            behavior_flags = trace_line[behavior_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                             behavior_flags_start)].strip()
+                            behavior_flags = behavior_flags.split(BEHAVIOR_FLAGS_SPLIT_DELIMITER)
 
-                                                        for swapchain_buffer_usage_flag in swapchain_buffer_usage:
-                                                            swapchian_buffer_usage_flag_stripped = swapchain_buffer_usage_flag.strip()
+                            for behavior_flag in behavior_flags:
+                                behavior_flag_stripped = behavior_flag.strip()
+                                self.behavior_flag_dictionary[behavior_flag_stripped] += 1
 
-                                                            existing_value = self.swapchain_buffer_usage_dictionary.get(swapchian_buffer_usage_flag_stripped, 0)
-                                                            self.swapchain_buffer_usage_dictionary[swapchian_buffer_usage_flag_stripped] = existing_value + 1
+                            if PRESENT_PARAMETERS_SKIP_IDENTIFIER not in trace_line:
+                                if PRESENT_PARAMETER_FLAGS_SKIP_IDENTIFIER not in trace_line:
+                                    present_parameter_flags_start = trace_line.find(PRESENT_PARAMETER_FLAGS_IDENTIFIER) + PRESENT_PARAMETER_FLAGS_IDENTIFIER_LENGTH
+                                    present_parameter_flags = trace_line[present_parameter_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                                                       present_parameter_flags_start)].strip()
+                                    present_parameter_flags = present_parameter_flags.split(PRESENT_PARAMETER_FLAGS_SPLIT_DELIMITER)
 
-                                                    elif swapchain_parameter_key == 'Flags':
-                                                        swapchain_flags = swapchain_parameter_value.split(SWAPCHAIN_FLAGS_VALUE_SPLIT_DELIMITER)
+                                    for present_parameter_flag in present_parameter_flags:
+                                        present_parameter_flag_stripped = present_parameter_flag.strip()
+                                        self.present_parameter_flag_dictionary[present_parameter_flag_stripped] += 1
 
-                                                        for swapchain_flag in swapchain_flags:
-                                                            swapchain_flag_stripped = swapchain_flag.strip()
+                                present_parameters_start = trace_line.find(PRESENT_PARAMETERS_IDENTIFIER) + PRESENT_PARAMETERS_IDENTIFIER_LENGTH
+                                present_parameters = trace_line[present_parameters_start:trace_line.find(PRESENT_PARAMETERS_IDENTIFIER_END,
+                                                                                                         present_parameters_start)].strip()
+                                present_parameters = present_parameters.split(PRESENT_PARAMETERS_SPLIT_DELIMITER)
 
-                                                            existing_value = self.swapchain_flag_dictionary.get(swapchain_flag_stripped, 0)
-                                                            self.swapchain_flag_dictionary[swapchain_flag_stripped] = existing_value + 1
+                                for present_parameter in present_parameters:
+                                    present_parameter_stripped = present_parameter.strip()
+                                    present_parameter_key, present_parameter_value = present_parameter_stripped.split(PRESENT_PARAMETERS_VALUE_SPLIT_DELIMITER)
 
-                                                    else:
-                                                        if swapchain_parameter_key == 'Count' or swapchain_parameter_key == 'Quality':
-                                                            swapchain_parameter_stripped = ' '.join(('SampleDesc', swapchain_parameter_stripped))
+                                    if present_parameter_key not in PRESENT_PARAMETERS_SKIPPED:
+                                        self.present_parameter_dictionary[present_parameter_stripped] += 1
 
-                                                        existing_value = self.swapchain_parameter_dictionary.get(swapchain_parameter_stripped, 0)
-                                                        self.swapchain_parameter_dictionary[swapchain_parameter_stripped] = existing_value + 1
-                                        except ValueError:
-                                            pass
+                        elif RENDER_STATES_CALL in call:
+                            logger.debug('Found render states on line: %s', trace_line)
 
-                            elif QUERY_TYPE_CALL_D3D9_10_11 in call:
-                                logger.debug(f'Found query type on line: {trace_line}')
+                            render_state_start = trace_line.find(RENDER_STATES_IDENTIFIER) + RENDER_STATES_IDENTIFIER_LENGTH
+                            render_state = trace_line[render_state_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                         render_state_start)].strip()
 
-                                query_type_start = trace_line.find(QUERY_TYPE_IDENTIFIER_D3D10_11) + QUERY_TYPE_IDENTIFIER_D3D10_11_LENGTH
-                                query_type = trace_line[query_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                         query_type_start)].strip()
+                            if render_state not in RENDER_STATES_SKIPPED:
+                                self.render_state_dictionary[render_state] += 1
 
-                                existing_value = self.query_type_dictionary.get(query_type, 0)
-                                self.query_type_dictionary[query_type] = existing_value + 1
+                            render_state_point_size = VENDOR_HACK_POINTSIZE in trace_line
+                            render_state_adaptivetess_x = VENDOR_HACK_ADAPTIVETESS_X in trace_line
+                            render_state_adaptivetess_y = VENDOR_HACK_ADAPTIVETESS_Y in trace_line
 
-                            elif RASTIZER_STATE_CALL in call:
-                                logger.debug(f'Found rastizer state on line: {trace_line}')
+                            if render_state_point_size or render_state_adaptivetess_x or render_state_adaptivetess_y:
+                                vendor_hack_start = trace_line.find(VENDOR_HACK_IDENTIFIER) + VENDOR_HACK_IDENTIFIER_LENGTH
+                                vendor_hack_value = trace_line[vendor_hack_start:trace_line.find(VENDOR_HACK_IDENTIFIER_END,
+                                                                                                 vendor_hack_start)].strip()
 
-                                if RASTIZER_STATE_IDENTIFIER in trace_line:
-                                    rastizer_states_start = trace_line.find(RASTIZER_STATE_IDENTIFIER) + RASTIZER_STATE_IDENTIFIER_LENGTH
-                                    rastizer_states = trace_line[rastizer_states_start:trace_line.find(RASTIZER_STATE_IDENTIFIER_END,
-                                                                                                       rastizer_states_start)].strip()
-                                    rastizer_states = rastizer_states.split(API_ENTRY_VALUE_DELIMITER)
+                                if render_state_point_size:
+                                    vendor_hack_render_state = 'D3DRS_POINTSIZE = '
+                                elif render_state_adaptivetess_x:
+                                    vendor_hack_render_state = 'D3DRS_ADAPTIVETESS_X = '
+                                elif render_state_adaptivetess_y:
+                                    vendor_hack_render_state = 'D3DRS_ADAPTIVETESS_Y = '
 
-                                    for rastizer_state in rastizer_states:
-                                        rastizer_state_stripped = rastizer_state.strip()
-                                        rastizer_state_key, rastizer_state_value = rastizer_state_stripped.split(RASTIZER_STATE_VALUE_SPLIT_DELIMITER)
+                                vendor_hack_value_int = int(vendor_hack_value)
 
-                                        if rastizer_state_key not in RASTIZER_STATE_SKIPPED:
-                                            existing_value = self.rastizer_state_dictionary.get(rastizer_state_stripped, 0)
-                                            self.rastizer_state_dictionary[rastizer_state_stripped] = existing_value + 1
+                                if vendor_hack_value in VENDOR_HACK_VALUES.keys():
+                                    logger.debug('Found vendor hack on line: %s', trace_line)
 
-                            elif BLEND_STATE_CALL in call:
-                                logger.debug(f'Found blend state on line: {trace_line}')
+                                    vendor_hack_value_lookup = VENDOR_HACK_VALUES[vendor_hack_value]
+                                    vendor_hack_value_decoded = ''.join((vendor_hack_render_state, vendor_hack_value_lookup))
+                                    self.vendor_hack_dictionary[vendor_hack_value_decoded] += 1
+                                elif vendor_hack_value_int > 0:
+                                    potential_vendor_hack_value = self.detect_potential_vendor_hack(vendor_hack_value_int, trace_line)
 
-                                if BLEND_STATE_IDENTIFIER in trace_line:
-                                    blend_states_start = trace_line.find(BLEND_STATE_IDENTIFIER) + BLEND_STATE_IDENTIFIER_LENGTH
-                                    blend_states_end = trace_line.find(BLEND_STATE_IDENTIFIER_END_D3D11, blend_states_start)
+                                    if potential_vendor_hack_value is not None:
+                                        logger.warning(f'Detected a potential vendor hack value: {potential_vendor_hack_value}')
 
-                                    # if the D3D11 end identifier is not found, look up the D3D10 end indetifier
-                                    if blend_states_end == -1:
-                                        blend_states_end = trace_line.find(BLEND_STATE_IDENTIFIER_END_D3D10, blend_states_start)
+                        # D3D8 uses IDirect3DDevice8::GetInfo calls to initiate queries
+                        elif api_d3d8 and QUERY_TYPE_CALL_D3D8 in call:
+                            logger.debug('Found query type on line: %s', trace_line)
 
-                                    blend_states = trace_line[blend_states_start:blend_states_end].strip()
-                                    blend_states = blend_states.split(API_ENTRY_VALUE_DELIMITER)
+                            query_type_start = trace_line.find(QUERY_TYPE_IDENTIFIER_D3D8) + QUERY_TYPE_IDENTIFIER_LENGTH_D3D8
+                            query_type = trace_line[query_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                     query_type_start)].strip()
+                            query_type_decoded = self.d3d8_query_type(query_type)
+                            logger.debug('Decoded query type is: %s', query_type_decoded)
 
-                                    for blend_state in blend_states:
-                                        blend_state_stripped = blend_state.strip()
-                                        existing_value = self.blend_state_dictionary.get(blend_state_stripped, 0)
-                                        self.blend_state_dictionary[blend_state_stripped] = existing_value + 1
+                            self.query_type_dictionary[query_type_decoded] += 1
 
-                            # shader version identifiers can either be part of CreateVertexShader/CreatePixelShader
-                            # calls, or included as part of an additional line below those calls in apitrace dumps
-                            elif (VERTEX_SHADER_CALL in call or PIXEL_SHADER_CALL in call or
-                                  COMPUTE_SHADER_CALL in call or DOMAIN_SHADER_CALL in call or
-                                  GEOMETRY_SHADER_CALL in call or HULL_SHADER_CALL in call or shader_line):
-                                logger.debug(f'Found shader on line: {trace_line}')
+                        # D3D9Ex/D3D9 use IDirect3DQuery9::CreateQuery to initiate queries
+                        elif api_d3d9 and QUERY_TYPE_CALL_D3D9_10_11 in call:
+                            logger.debug('Found query type on line: %s', trace_line)
 
-                                # not having a shader line means it's a shader creation call
-                                if not shader_line:
-                                    if self.shader_dump and trace_call_counter > 0 and SHADER_DUMP_SKIP_IDENTIFIER_D3D10_11 not in trace_line:
-                                        self.shader_dump_call_array.append(str(trace_call_counter))
+                            query_type_start = trace_line.find(QUERY_TYPE_IDENTIFIER_D3D9) + QUERY_TYPE_IDENTIFIER_LENGTH_D3D9
+                            query_type = trace_line[query_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                     query_type_start)].strip()
 
-                                    # shader dissasebly can fail, in which case apitrace will dump bytecode blobs
-                                    if not SHADER_NO_DISASSEMBLY_D3D10_11 in trace_line:
-                                        if not shader_call_context:
-                                            shader_call_context = True
-                                        else:
-                                            logger.warning('Shader call context already detected')
+                            self.query_type_dictionary[query_type] += 1
+
+                        elif LOCK_FLAGS_CALL in call:
+                            logger.debug('Found lock flags on line: %s', trace_line)
+
+                            if LOCK_FLAGS_SKIP_IDENTIFIER not in trace_line:
+                                lock_flags_start = trace_line.find(LOCK_FLAGS_IDENTIFIER) + LOCK_FLAGS_IDENTIFIER_LENGTH
+                                lock_flags = trace_line[lock_flags_start:trace_line.find(LOCK_FLAGS_IDENTIFIER_END,
+                                                                                        lock_flags_start)].strip()
+
+                                lock_flags = lock_flags.split(LOCK_FLAGS_SPLIT_DELIMITER)
+
+                                for lock_flag in lock_flags:
+                                    lock_flag_stripped = lock_flag.strip()
+
+                                    # Mafia sets several bogus lock values (not part of the enum)
+                                    if lock_flag_stripped.startswith(LOCK_FLAGS_VALUE_IDENTIFIER):
+                                        self.lock_flag_dictionary[lock_flag_stripped] += 1
+
+                        # shader version identifiers can either be part of CreateVertexShader/CreatePixelShader
+                        # calls, or included as part of an additional line below those calls in apitrace dumps
+                        elif VERTEX_SHADER_CALL in call or PIXEL_SHADER_CALL in call or shader_line:
+                            logger.debug('Found shader on line: %s', trace_line)
+
+                            # not having a shader line means it's a shader creation call
+                            if not shader_line:
+                                if self.shader_dump and trace_call_counter > 0 and SHADER_DUMP_SKIP_IDENTIFIER_D3D8_9 not in trace_line:
+                                    self.shader_dump_call_array.append(str(trace_call_counter))
+
+                                # shader dissasebly can fail, in which case apitrace will dump bytecode blobs
+                                if not SHADER_NO_DISASSEMBLY_D3D8_9 in trace_line:
+                                    if not shader_call_context:
+                                        shader_call_context = True
                                     else:
-                                        logger.warning('Unable to parse shader version due to bytecode dump')
+                                        logger.warning('Shader call context already detected')
+                                else:
+                                    logger.warning('Unable to parse shader version due to bytecode dump')
+
+                            # don't do any parsing unless a shader creation call has been detected
+                            if shader_call_context:
+                                # strip any comments from a shader line
+                                if shader_line:
+                                    trace_line = trace_line.split('//')[0].rstrip()
+
+                                # D3D8 handles FVF thourgh CreateVertexShader, and there is no way to
+                                # track these otherwise, so treat them as 'vs_fvf' shader versions instead
+                                if api_d3d8 and VERTEX_SHADER_CALL in call and 'pFunction = NULL' in trace_line:
+                                    shader_version = 'vs_fvf'
+                                    logger.debug('Shader version: %s', shader_version)
+
+                                    self.shader_version_dictionary[shader_version] += 1
 
-                                # don't do any parsing unless a shader creation call has been detected
-                                if shader_call_context:
-                                    # strip any comments from a shader line
-                                    if shader_line:
-                                        trace_line = trace_line.split('//')[0].rstrip()
+                                    shader_call_context = False
 
+                                else:
                                     shader_version = None
 
                                     shader_version_start_vertex = trace_line.find(VERTEX_SHADER_IDENTIFIER)
                                     shader_version_start_pixel = trace_line.find(PIXEL_SHADER_IDENTIFIER)
-                                    shader_version_start_compute = trace_line.find(COMPUTE_SHADER_IDENTIFIER)
-                                    shader_version_start_domain = trace_line.find(DOMAIN_SHADER_IDENTIFIER)
-                                    shader_version_start_geometry = trace_line.find(GEOMETRY_SHADER_IDENTIFIER)
-                                    shader_version_start_hull = trace_line.find(HULL_SHADER_IDENTIFIER)
 
                                     if shader_version_start_vertex != -1:
                                         shader_version = trace_line[shader_version_start_vertex:shader_version_start_vertex +
@@ -1697,84 +1555,296 @@ class TraceStats:
                                         shader_version = trace_line[shader_version_start_pixel:shader_version_start_pixel +
                                                                                             PIXEL_SHADER_IDENTIFIER_LENGTH +
                                                                                             SHADER_VERSION_OFFSET]
-                                    elif shader_version_start_compute != -1:
-                                        shader_version = trace_line[shader_version_start_compute:shader_version_start_compute +
-                                                                                                COMPUTE_SHADER_IDENTIFIER_LENGTH +
-                                                                                                SHADER_VERSION_OFFSET]
-                                    elif shader_version_start_domain != -1:
-                                        shader_version = trace_line[shader_version_start_domain:shader_version_start_domain +
-                                                                                                DOMAIN_SHADER_IDENTIFIER_LENGTH +
-                                                                                                SHADER_VERSION_OFFSET]
-                                    elif shader_version_start_geometry != -1:
-                                        shader_version = trace_line[shader_version_start_geometry:shader_version_start_geometry +
-                                                                                                GEOMETRY_SHADER_IDENTIFIER_LENGTH +
-                                                                                                SHADER_VERSION_OFFSET]
-                                    elif shader_version_start_hull != -1:
-                                        shader_version = trace_line[shader_version_start_hull:shader_version_start_hull +
-                                                                                            HULL_SHADER_IDENTIFIER_LENGTH +
-                                                                                            SHADER_VERSION_OFFSET]
 
                                     # count '_' occurances to filter out some potentially dubious string matches
                                     if shader_version is not None and shader_version.count('_') == 2:
-                                        logger.debug(f'Shader version: {shader_version}')
+                                        logger.debug('Shader version: %s', shader_version)
 
-                                        existing_value = self.shader_version_dictionary.get(shader_version, 0)
-                                        self.shader_version_dictionary[shader_version] = existing_value + 1
+                                        self.shader_version_dictionary[shader_version] += 1
 
                                         shader_call_context = False
+                            else:
+                                logger.debug('Skipped parsing of shader line: %s', trace_line)
+
+                        elif API_ENTRY_FORMAT_BASE_CALL in call:
+                            if FORMAT_IDENTIFIER in trace_line:
+                                logger.debug('Found format on line: %s', trace_line)
+
+                                format_start = trace_line.find(FORMAT_IDENTIFIER) + FORMAT_IDENTIFIER_LENGTH
+                                format_value = trace_line[format_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                       format_start)].strip()
+
+                                self.format_dictionary[format_value] += 1
+
+                            if USAGE_IDENTIFIER in trace_line:
+                                logger.debug('Found usage on line: %s', trace_line)
+
+                                if USAGE_SKIP_IDENTIFIER not in trace_line:
+                                    usage_start = trace_line.find(USAGE_IDENTIFIER) + USAGE_IDENTIFIER_LENGTH
+                                    # Usually, usage values will end on a comma
+                                    usage_end = trace_line.find(API_ENTRY_VALUE_DELIMITER, usage_start)
+                                    # In D3D8, usage values are also included in CreateVertexShader
+                                    # calls, where they sit at the end of the parameter list
+                                    if usage_end == -1:
+                                        usage_end = trace_line.find(USAGE_IDENTIFIER_END_D3D8, usage_start)
+                                    usage_values = trace_line[usage_start:usage_end].strip()
+                                    usage_values = usage_values.split(USAGE_SPLIT_DELIMITER)
+
+                                    for usage_value in usage_values:
+                                        usage_value_stripped = usage_value.strip()
+                                        if usage_value_stripped.startswith(USAGE_VALUE_IDENTIFIER):
+                                            self.usage_dictionary[usage_value_stripped] += 1
+
+                            if POOL_IDENTIFIER in trace_line:
+                                logger.debug('Found pool on line: %s', trace_line)
+
+                                pool_start = trace_line.find(POOL_IDENTIFIER) + POOL_IDENTIFIER_LENGTH
+                                pool_value = trace_line[pool_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                   pool_start)].strip()
+
+                                self.pool_dictionary[pool_value] += 1
+
+                    elif api_d3d10_d3d11:
+                        if DEVICE_FLAGS_AND_FEATURE_LEVELS_CALL in call:
+                            logger.debug('Found device flags and feature levels on line: %s', trace_line)
+
+                            if DEVICE_FLAGS_SKIP_IDENTIFIER not in trace_line:
+                                device_flags_start = trace_line.find(DEVICE_FLAGS_IDENTIFIER) + DEVICE_FLAGS_IDENTIFIER_LENGTH
+                                device_flags = trace_line[device_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                             device_flags_start)].strip()
+                                device_flags = device_flags.split(DEVICE_FLAGS_SPLIT_DELIMITER)
+
+                                for device_flag in device_flags:
+                                    device_flag_stripped = device_flag.strip()
+                                    self.device_flag_dictionary[device_flag_stripped] += 1
+
+                            if FEATURE_LEVELS_SKIP_IDENTIFIER not in trace_line:
+                                if FEATURE_LEVELS_IDENTIFIER in trace_line:
+                                    feature_levels_start = trace_line.find(FEATURE_LEVELS_IDENTIFIER) + FEATURE_LEVELS_IDENTIFIER_LENGTH
+                                    feature_levels = trace_line[feature_levels_start:trace_line.find(FEATURE_LEVELS_IDENTIFIER_END,
+                                                                                                     feature_levels_start)].strip()
+                                    feature_levels = feature_levels.split(API_ENTRY_VALUE_DELIMITER)
+
+                                    for feature_level in feature_levels:
+                                        feature_level_stripped = feature_level.strip()
+                                        self.feature_level_dictionary[feature_level_stripped] += 1
+
+                                elif FEATURE_LEVELS_IDENTIFIER_ONE in trace_line:
+                                    feature_levels_start = trace_line.find(FEATURE_LEVELS_IDENTIFIER_ONE) + FEATURE_LEVELS_IDENTIFIER_ONE_LENGTH
+                                    feature_level_stripped = trace_line[feature_levels_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                                             feature_levels_start)].strip()
+                                    self.feature_level_dictionary[feature_level_stripped] += 1
+
+                        # need to cater for 'CreateDeviceAndSwapChain' parameters parsing too, so no elif
+                        if SWAPCHAIN_PARAMETERS_CALL in call or SWAPCHAIN_DEVICE_PARAMETERS_CALL in call:
+                            logger.debug('Found swapchain parameters on line: %s', trace_line)
+
+                            if SWAPCHAIN_PARAMETERS_SKIP_IDENTIFIER not in trace_line and SWAPCHAIN_PARAMETERS_SKIP_IDENTIFIER_2 not in trace_line:
+                                swapchain_parameters_position = trace_line.find(SWAPCHAIN_PARAMETERS_IDENTIFIER)
+                                swapchain_parameters_variant = SWAPCHAIN_PARAMETERS_IDENTIFIER if swapchain_parameters_position != -1 else SWAPCHAIN_PARAMETERS_IDENTIFIER_2
+                                swapchain_parameters_length_variant = SWAPCHAIN_PARAMETERS_IDENTIFIER_LENGTH if swapchain_parameters_position != -1 else SWAPCHAIN_PARAMETERS_IDENTIFIER_LENGTH_2
+
+                                swapchain_parameters_end_position = trace_line.find(SWAPCHAIN_PARAMETERS_IDENTIFIER_END)
+                                swapchain_parameters_end_variant = SWAPCHAIN_PARAMETERS_IDENTIFIER_END if swapchain_parameters_end_position != -1 else SWAPCHAIN_PARAMETERS_IDENTIFIER_END_2
+
+
+                                swapchain_parameters_start = trace_line.find(swapchain_parameters_variant) + swapchain_parameters_length_variant
+                                swapchain_parameters = trace_line[swapchain_parameters_start:trace_line.find(swapchain_parameters_end_variant,
+                                                                                                             swapchain_parameters_start)].strip()
+                                # we need to strip the the desc for any array flags and add split delimiters
+                                swapchain_parameters = swapchain_parameters.replace('{', SWAPCHAIN_PARAMETERS_SPLIT_DELIMITER).replace('}', SWAPCHAIN_PARAMETERS_SPLIT_DELIMITER)
+                                swapchain_parameters = swapchain_parameters.split(SWAPCHAIN_PARAMETERS_SPLIT_DELIMITER)
+
+                                for swapchain_parameter in swapchain_parameters:
+                                    swapchain_parameter_stripped = swapchain_parameter.strip()
+
+                                    try:
+                                        swapchain_parameter_key, swapchain_parameter_value = swapchain_parameter_stripped.split(SWAPCHAIN_PARAMETERS_VALUE_SPLIT_DELIMITER, 1)
+
+                                        if swapchain_parameter_key in SWAPCHAIN_PARAMETERS_CAPTURED:
+                                            if swapchain_parameter_value != '0x0':
+                                                if swapchain_parameter_key == 'BufferUsage':
+                                                    swapchain_buffer_usage = swapchain_parameter_value.split(SWAPCHAIN_BUFFER_USAGE_VALUE_SPLIT_DELIMITER)
+
+                                                    for swapchain_buffer_usage_flag in swapchain_buffer_usage:
+                                                        swapchian_buffer_usage_flag_stripped = swapchain_buffer_usage_flag.strip()
+
+                                                        self.swapchain_buffer_usage_dictionary[swapchian_buffer_usage_flag_stripped] += 1
+
+                                                elif swapchain_parameter_key == 'Flags':
+                                                    swapchain_flags = swapchain_parameter_value.split(SWAPCHAIN_FLAGS_VALUE_SPLIT_DELIMITER)
+
+                                                    for swapchain_flag in swapchain_flags:
+                                                        swapchain_flag_stripped = swapchain_flag.strip()
+
+                                                        self.swapchain_flag_dictionary[swapchain_flag_stripped] += 1
+
+                                                else:
+                                                    if swapchain_parameter_key == 'Count' or swapchain_parameter_key == 'Quality':
+                                                        swapchain_parameter_stripped = ' '.join(('SampleDesc', swapchain_parameter_stripped))
+
+                                                    self.swapchain_parameter_dictionary[swapchain_parameter_stripped] += 1
+                                    except ValueError:
+                                        pass
+
+                        elif QUERY_TYPE_CALL_D3D9_10_11 in call:
+                            logger.debug('Found query type on line: %s', trace_line)
+
+                            query_type_start = trace_line.find(QUERY_TYPE_IDENTIFIER_D3D10_11) + QUERY_TYPE_IDENTIFIER_D3D10_11_LENGTH
+                            query_type = trace_line[query_type_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                     query_type_start)].strip()
+
+                            self.query_type_dictionary[query_type] += 1
+
+                        elif RASTIZER_STATE_CALL in call:
+                            logger.debug('Found rastizer state on line: %s', trace_line)
+
+                            if RASTIZER_STATE_IDENTIFIER in trace_line:
+                                rastizer_states_start = trace_line.find(RASTIZER_STATE_IDENTIFIER) + RASTIZER_STATE_IDENTIFIER_LENGTH
+                                rastizer_states = trace_line[rastizer_states_start:trace_line.find(RASTIZER_STATE_IDENTIFIER_END,
+                                                                                                   rastizer_states_start)].strip()
+                                rastizer_states = rastizer_states.split(API_ENTRY_VALUE_DELIMITER)
+
+                                for rastizer_state in rastizer_states:
+                                    rastizer_state_stripped = rastizer_state.strip()
+                                    rastizer_state_key, rastizer_state_value = rastizer_state_stripped.split(RASTIZER_STATE_VALUE_SPLIT_DELIMITER)
+
+                                    if rastizer_state_key not in RASTIZER_STATE_SKIPPED:
+                                        self.rastizer_state_dictionary[rastizer_state_stripped] += 1
+
+                        elif BLEND_STATE_CALL in call:
+                            logger.debug('Found blend state on line: %s', trace_line)
+
+                            if BLEND_STATE_IDENTIFIER in trace_line:
+                                blend_states_start = trace_line.find(BLEND_STATE_IDENTIFIER) + BLEND_STATE_IDENTIFIER_LENGTH
+                                blend_states_end = trace_line.find(BLEND_STATE_IDENTIFIER_END_D3D11, blend_states_start)
+
+                                # if the D3D11 end identifier is not found, look up the D3D10 end indetifier
+                                if blend_states_end == -1:
+                                    blend_states_end = trace_line.find(BLEND_STATE_IDENTIFIER_END_D3D10, blend_states_start)
+
+                                blend_states = trace_line[blend_states_start:blend_states_end].strip()
+                                blend_states = blend_states.split(API_ENTRY_VALUE_DELIMITER)
+
+                                for blend_state in blend_states:
+                                    blend_state_stripped = blend_state.strip()
+                                    self.blend_state_dictionary[blend_state_stripped] += 1
+
+                        # shader version identifiers can either be part of CreateVertexShader/CreatePixelShader
+                        # calls, or included as part of an additional line below those calls in apitrace dumps
+                        elif (VERTEX_SHADER_CALL in call or PIXEL_SHADER_CALL in call or
+                              COMPUTE_SHADER_CALL in call or DOMAIN_SHADER_CALL in call or
+                              GEOMETRY_SHADER_CALL in call or HULL_SHADER_CALL in call or shader_line):
+                            logger.debug('Found shader on line: %s', trace_line)
+
+                            # not having a shader line means it's a shader creation call
+                            if not shader_line:
+                                if self.shader_dump and trace_call_counter > 0 and SHADER_DUMP_SKIP_IDENTIFIER_D3D10_11 not in trace_line:
+                                    self.shader_dump_call_array.append(str(trace_call_counter))
+
+                                # shader dissasebly can fail, in which case apitrace will dump bytecode blobs
+                                if not SHADER_NO_DISASSEMBLY_D3D10_11 in trace_line:
+                                    if not shader_call_context:
+                                        shader_call_context = True
+                                    else:
+                                        logger.warning('Shader call context already detected')
                                 else:
-                                    logger.debug(f'Skipped parsing of shader line: {trace_line}')
+                                    logger.warning('Unable to parse shader version due to bytecode dump')
+
+                            # don't do any parsing unless a shader creation call has been detected
+                            if shader_call_context:
+                                # strip any comments from a shader line
+                                if shader_line:
+                                    trace_line = trace_line.split('//')[0].rstrip()
+
+                                shader_version = None
+
+                                shader_version_start_vertex = trace_line.find(VERTEX_SHADER_IDENTIFIER)
+                                shader_version_start_pixel = trace_line.find(PIXEL_SHADER_IDENTIFIER)
+                                shader_version_start_compute = trace_line.find(COMPUTE_SHADER_IDENTIFIER)
+                                shader_version_start_domain = trace_line.find(DOMAIN_SHADER_IDENTIFIER)
+                                shader_version_start_geometry = trace_line.find(GEOMETRY_SHADER_IDENTIFIER)
+                                shader_version_start_hull = trace_line.find(HULL_SHADER_IDENTIFIER)
+
+                                if shader_version_start_vertex != -1:
+                                    shader_version = trace_line[shader_version_start_vertex:shader_version_start_vertex +
+                                                                                            VERTEX_SHADER_IDENTIFIER_LENGTH +
+                                                                                            SHADER_VERSION_OFFSET]
+                                elif shader_version_start_pixel != -1:
+                                    shader_version = trace_line[shader_version_start_pixel:shader_version_start_pixel +
+                                                                                        PIXEL_SHADER_IDENTIFIER_LENGTH +
+                                                                                        SHADER_VERSION_OFFSET]
+                                elif shader_version_start_compute != -1:
+                                    shader_version = trace_line[shader_version_start_compute:shader_version_start_compute +
+                                                                                            COMPUTE_SHADER_IDENTIFIER_LENGTH +
+                                                                                            SHADER_VERSION_OFFSET]
+                                elif shader_version_start_domain != -1:
+                                    shader_version = trace_line[shader_version_start_domain:shader_version_start_domain +
+                                                                                            DOMAIN_SHADER_IDENTIFIER_LENGTH +
+                                                                                            SHADER_VERSION_OFFSET]
+                                elif shader_version_start_geometry != -1:
+                                    shader_version = trace_line[shader_version_start_geometry:shader_version_start_geometry +
+                                                                                            GEOMETRY_SHADER_IDENTIFIER_LENGTH +
+                                                                                            SHADER_VERSION_OFFSET]
+                                elif shader_version_start_hull != -1:
+                                    shader_version = trace_line[shader_version_start_hull:shader_version_start_hull +
+                                                                                        HULL_SHADER_IDENTIFIER_LENGTH +
+                                                                                        SHADER_VERSION_OFFSET]
 
-                            elif API_ENTRY_FORMAT_BASE_CALL in call:
-                                if FORMAT_IDENTIFIER in trace_line:
-                                    logger.debug(f'Found format on line: {trace_line}')
+                                # count '_' occurances to filter out some potentially dubious string matches
+                                if shader_version is not None and shader_version.count('_') == 2:
+                                    logger.debug('Shader version: %s', shader_version)
 
-                                    format_start = trace_line.find(FORMAT_IDENTIFIER) + FORMAT_IDENTIFIER_LENGTH
-                                    format_value = trace_line[format_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                           format_start)].strip()
+                                    self.shader_version_dictionary[shader_version] += 1
 
-                                    # at times the format value can end in a '},' block
-                                    format_value = format_value.replace('}', '')
+                                    shader_call_context = False
+                            else:
+                                logger.debug('Skipped parsing of shader line: %s', trace_line)
 
-                                    existing_value = self.format_dictionary.get(format_value, 0)
-                                    self.format_dictionary[format_value] = existing_value + 1
+                        elif API_ENTRY_FORMAT_BASE_CALL in call:
+                            if FORMAT_IDENTIFIER in trace_line:
+                                logger.debug('Found format on line: %s', trace_line)
 
-                                if USAGE_IDENTIFIER in trace_line:
-                                    logger.debug(f'Found usage on line: {trace_line}')
+                                format_start = trace_line.find(FORMAT_IDENTIFIER) + FORMAT_IDENTIFIER_LENGTH
+                                format_value = trace_line[format_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                       format_start)].strip()
 
-                                    usage_start = trace_line.find(USAGE_IDENTIFIER) + USAGE_IDENTIFIER_LENGTH
-                                    usage_value = trace_line[usage_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                         usage_start)].strip()
+                                # at times the format value can end in a '},' block
+                                format_value = format_value.replace('}', '')
 
-                                    # at times there can be a single usage flag, ending in '},'
-                                    usage_value = usage_value.replace('}', '')
+                                self.format_dictionary[format_value] += 1
 
-                                    if not USAGE_SKIP_IDENTIFIER_D3D10_11 in usage_value:
-                                        existing_value = self.usage_dictionary.get(usage_value, 0)
-                                        self.usage_dictionary[usage_value] = existing_value + 1
+                            if USAGE_IDENTIFIER in trace_line:
+                                logger.debug('Found usage on line: %s', trace_line)
 
-                                if BIND_FLAGS_IDENTIFIER in trace_line:
-                                    logger.debug(f'Found bind flags on line: {trace_line}')
+                                usage_start = trace_line.find(USAGE_IDENTIFIER) + USAGE_IDENTIFIER_LENGTH
+                                usage_value = trace_line[usage_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                     usage_start)].strip()
 
-                                    if BIND_FLAGS_SKIP_IDENTIFIER not in trace_line:
-                                        bind_flags_start = trace_line.find(BIND_FLAGS_IDENTIFIER) + BIND_FLAGS_IDENTIFIER_LENGTH
-                                        bind_flags = trace_line[bind_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
-                                                                                                bind_flags_start)].strip()
+                                # at times there can be a single usage flag, ending in '},'
+                                usage_value = usage_value.replace('}', '')
 
-                                        bind_flags = bind_flags.split(BIND_FLAGS_SPLIT_DELIMITER)
+                                if not USAGE_SKIP_IDENTIFIER_D3D10_11 in usage_value:
+                                    self.usage_dictionary[usage_value] += 1
 
-                                        for bind_flag in bind_flags:
-                                            bind_flag_stripped = bind_flag.strip()
-                                            existing_value = self.bind_flag_dictionary.get(bind_flag_stripped, 0)
-                                            self.bind_flag_dictionary[bind_flag_stripped] = existing_value + 1
+                            if BIND_FLAGS_IDENTIFIER in trace_line:
+                                logger.debug('Found bind flags on line: %s', trace_line)
 
-                    else:
-                        # these will usually be (numbered) memcpy lines
-                        logger.debug(f'Skipped parsing of numbered line: {trace_line}')
+                                if BIND_FLAGS_SKIP_IDENTIFIER not in trace_line:
+                                    bind_flags_start = trace_line.find(BIND_FLAGS_IDENTIFIER) + BIND_FLAGS_IDENTIFIER_LENGTH
+                                    bind_flags = trace_line[bind_flags_start:trace_line.find(API_ENTRY_VALUE_DELIMITER,
+                                                                                            bind_flags_start)].strip()
+
+                                    bind_flags = bind_flags.split(BIND_FLAGS_SPLIT_DELIMITER)
+
+                                    for bind_flag in bind_flags:
+                                        bind_flag_stripped = bind_flag.strip()
+                                        self.bind_flag_dictionary[bind_flag_stripped] += 1
 
                     if trace_call_counter > 0 and trace_call_counter % TRACE_LOGGING_CHUNK_CALLS == 0:
                         logger.info(f'Proccessed {trace_call_counter} apitrace calls...')
 
+                self.api_call_dictionary.update(trace_chunk_calls)
                 self.process_queue.task_done()
 
             except queue.Empty: